@@ -0,0 +1,42 @@
+"""
+Micro-benchmark: per-invocation cost of building the agent chains (previous behaviour of
+_get_llm_chain) versus looking them up in the prebuilt registry.
+
+Run from the project root:  python -m benchmarks.bench_chain_build [iterations]
+No LLM call is made, so a placeholder GROQ_API_KEY is enough.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from data_generator.data_loader import get_data_manager
+from orchestrator import agents
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    results = {}
+    for role, is_analyst in (("supervisor", False), ("analyst", True)):
+        # Previous behaviour: rebuild prompt + bind tools / structured output on every node call
+        rebuild = _time_per_call(
+            lambda: agents._build_chain(is_analyst, get_data_manager().get_schema_context()), iterations
+        )
+        cached = _time_per_call(lambda: agents._get_llm_chain(is_analyst), iterations)
+        results[role] = (rebuild, cached)
+
+    print(f"{'chain':<12}{'rebuild (us)':>14}{'registry (us)':>15}{'saved/call (us)':>17}")
+    for role, (rebuild, cached) in results.items():
+        print(f"{role:<12}{rebuild:>14.1f}{cached:>15.1f}{rebuild - cached:>17.1f}")
+    per_query = sum(rebuild - cached for rebuild, cached in results.values()) * 5
+    print(f"\n~{per_query / 1000:.2f} ms saved per query at 10 node calls (5 supervisor + 5 analyst)")
+
+if __name__ == "__main__":
+    main()
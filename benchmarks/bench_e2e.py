@@ -0,0 +1,209 @@
+"""
+Offline end-to-end benchmark: drives the FastAPI app in-process (straight through ASGI) with a
+corpus of queries while a scripted stub replaces the Groq model, so redaction, graph, sandbox
+and serialization overhead can be tracked without an API key or network access.
+
+Reports, per concurrency level: latency p50/p95/p99, throughput, time spent per graph node
+(from /analyze/stream node events) and resident memory of the API process and sandbox workers.
+
+Run from the project root:
+    python -m benchmarks.bench_e2e --concurrency 1,4,16 --requests 96 --latency-ms 300
+
+By default the rate limiter and response cache are off and the datasets are generated
+synthetically (DATASET_PATH1/2=""), so runs are comparable across machines. Corpus format
+(JSONL): {"query": "...", "code": ["<tool call 1>", ...]}; an empty `code` list is answered
+without a tool call.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus.jsonl")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=0, help="requests per level (default: 4x corpus)")
+    parser.add_argument("--warmup", type=int, default=0, help="unmeasured requests first (default: corpus size)")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="simulated LLM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+def _configure_environment(args):
+    """Must run before the app is imported: Config reads the environment at import time."""
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    os.environ.setdefault("DATASET_PATH1", "")
+    os.environ.setdefault("DATASET_PATH2", "")
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+    os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "0")
+    if not args.cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+def _rss_mb(pid: str = "self", field: str = "VmRSS") -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith(field + ":")) / 1024
+    except (OSError, StopIteration):
+        return float("nan")
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "mean": float(np.mean(values))}
+
+async def _stream_lines(app, path: str, payload: dict):
+    """
+    Calls the ASGI app directly and yields response lines as the app sends them. (httpx's
+    ASGITransport buffers the whole body, which would hide per-node timing.)
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    chunks = asyncio.Queue()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # Never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            await chunks.put(message.get("body", b""))
+            if not message.get("more_body", False):
+                await chunks.put(None)
+
+    task = asyncio.create_task(app(scope, receive, send))
+    buffer = b""
+    while (chunk := await chunks.get()) is not None:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+    await task
+
+async def _timed_request(app, query: str, node_times: dict) -> tuple:
+    """Streams one query; returns (latency_seconds, ok) and adds per-node durations to node_times."""
+    start = last = time.perf_counter()
+    ok = False
+    async for line in _stream_lines(app, "/analyze/stream", {"query": query}):
+        if not line:
+            continue
+        event = json.loads(line)
+        now = time.perf_counter()
+        if event["event"] == "node":
+            # A node event is emitted when the node finishes: it ran since the previous one
+            node_times[event["node"]].append(now - last)
+            last = now
+        elif event["event"] == "final":
+            ok = True
+    return time.perf_counter() - start, ok
+
+async def _run_level(app, queries: list, concurrency: int, total: int) -> dict:
+    pending = asyncio.Queue()
+    for i in range(total):
+        pending.put_nowait(queries[i % len(queries)])
+    latencies, errors, node_times = [], 0, defaultdict(list)
+
+    async def client_loop():
+        nonlocal errors
+        while not pending.empty():
+            query = pending.get_nowait()
+            try:
+                latency, ok = await _timed_request(app, query, node_times)
+            except Exception:
+                latency, ok = None, False
+            if ok:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall,
+        "latency_seconds": _percentiles(latencies),
+        "node_seconds": {node: _percentiles(times) for node, times in sorted(node_times.items())},
+        "rss_mb": _rss_mb(),
+    }
+
+def _print_level(result: dict):
+    lat = result["latency_seconds"]
+    print(f"\n== {result['concurrency']} concurrent clients: {result['requests']} requests, "
+          f"{result['errors']} errors, {result['throughput_rps']:.2f} req/s, RSS {result['rss_mb']:.0f} MB")
+    if lat["p50"] is not None:
+        print(f"   latency ms  p50 {lat['p50'] * 1e3:8.1f}   p95 {lat['p95'] * 1e3:8.1f}   p99 {lat['p99'] * 1e3:8.1f}")
+    for node, times in result["node_seconds"].items():
+        print(f"   {node:<14} mean {times['mean'] * 1e3:8.1f} ms   p95 {times['p95'] * 1e3:8.1f} ms")
+
+async def _run(args, app, queries: list, levels: list) -> list:
+    await _run_level(app, queries, 1, args.warmup or len(queries))
+    return [await _run_level(app, queries, level, args.requests or 4 * len(queries)) for level in levels]
+
+def main():
+    args = parse_args()
+    _configure_environment(args)
+
+    rss_before_import = _rss_mb()
+    import main as service
+    from orchestrator import agents
+    from orchestrator.tools import get_sandbox
+    from benchmarks.stub_llm import ScriptedChatModel
+
+    with open(args.corpus) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    queries = [entry["query"] for entry in corpus]
+    # The model only ever sees redacted queries, so scripts are keyed the same way
+    scripts = {service.redactor.redact_query(entry["query"]): entry.get("code", []) for entry in corpus}
+
+    agents.PRIMARY_LLM = ScriptedChatModel(
+        scripts=scripts, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed
+    )
+    asyncio.run(service.warm_up())
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"Corpus: {len(corpus)} queries | simulated LLM latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms | "
+          f"supervisor mode {service.Config.SUPERVISOR_MODE} | sandbox workers {service.Config.SANDBOX_WORKERS}")
+    results = asyncio.run(_run(args, service.create_app(), queries, levels))
+    for result in results:
+        _print_level(result)
+
+    memory = {
+        "api_rss_before_import_mb": rss_before_import,
+        "api_rss_mb": _rss_mb(),
+        "api_peak_rss_mb": _rss_mb(field="VmHWM"),
+        "sandbox_workers_rss_mb": [_rss_mb(str(worker.process.pid)) for worker in get_sandbox()._workers],
+    }
+    print(f"\nMemory: API {memory['api_rss_before_import_mb']:.0f} MB before import, "
+          f"{memory['api_rss_mb']:.0f} MB now, {memory['api_peak_rss_mb']:.0f} MB peak; sandbox workers "
+          + ", ".join(f"{rss:.0f}" for rss in memory["sandbox_workers_rss_mb"]) + " MB")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "levels": results, "memory": memory}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
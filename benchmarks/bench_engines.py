@@ -0,0 +1,149 @@
+"""
+Compares the in-memory pandas engine with the out-of-core DuckDB engine (DATA_ENGINE) at
+several multiples of the default dataset size (2000 patients x 10 days).
+
+For every scale the synthetic CSVs are written once (streamed in chunks), then each engine
+runs in its own process so peak memory is measured in isolation:
+  - load: building the DataManager and its startup dataset version (snapshot/Parquet
+    exports are built by an unmeasured first process, as on a warm restart)
+  - queries: typical analyst questions written the way the analyst prompt asks for each
+    engine (pandas code vs. sql()), executed like the sandbox does, single-threaded
+  - peak RSS of the process after loading and after the queries
+
+Run from the project root:
+    python -m benchmarks.bench_engines --scales 1,10,100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# name -> (pandas code, DuckDB code); each sets `result`
+QUERIES = {
+    "steps_by_smoking": (
+        "result = df_activity.merge(df_health[['Patient_Number', 'Smoking']], on='Patient_Number')"
+        ".groupby('Smoking')['Physical_activity'].mean()",
+        "result = sql('SELECT h.Smoking, AVG(a.Physical_activity) AS steps FROM df_activity a "
+        "JOIN df_health h USING (Patient_Number) GROUP BY h.Smoking ORDER BY h.Smoking')",
+    ),
+    "low_activity_patients": (
+        "result = df_activity.loc[df_activity['Physical_activity'] < 2000, 'Patient_Number'].nunique()",
+        "result = sql('SELECT COUNT(DISTINCT Patient_Number) AS n FROM df_activity WHERE Physical_activity < 2000')",
+    ),
+    "day_profile": (
+        "result = df_activity.groupby('Day_Number')['Physical_activity'].agg(['mean', 'std', 'count'])",
+        "result = sql('SELECT Day_Number, AVG(Physical_activity) AS mean, STDDEV_SAMP(Physical_activity) AS std, "
+        "COUNT(*) AS count FROM df_activity GROUP BY Day_Number ORDER BY Day_Number')",
+    ),
+    "ckd_trend": (
+        "result = df_patient_activity.groupby(df_health['Chronic_kidney_disease'])['Activity_Trend'].mean()",
+        "result = sql('SELECT h.Chronic_kidney_disease, AVG(p.Activity_Trend) AS trend FROM df_patient_activity p "
+        "JOIN df_health h USING (Patient_Number) GROUP BY 1 ORDER BY 1')",
+    ),
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated multiples of 2000 patients")
+    parser.add_argument("--days", type=int, default=10, help="activity rows per patient")
+    parser.add_argument("--engines", default="pandas,duckdb")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--workdir", help="where datasets and exports are written (default: a temp dir)")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    # Internal: run one engine in this process
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "DATA_DIR"), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def _peak_rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+
+def _child(engine: str, data_dir: str, repeats: int):
+    """Loads the datasets with one engine and times the queries; prints one JSON line."""
+    start = time.perf_counter()
+    from data_generator.data_loader import get_data_manager
+    data_manager = get_data_manager()
+    load_seconds = time.perf_counter() - start
+    rss_after_load = _peak_rss_mb()
+
+    version = data_manager.current
+    if engine == "duckdb":
+        from data_generator.columnar import ParquetFrames, attach_parquet
+        frames, _ = attach_parquet(ParquetFrames(version.parquet_paths).manifest["duckdb"])
+    else:
+        frames = {name: getattr(version, name) for name in ("df_health", "df_activity", "df_patient_activity")}
+
+    query_seconds = {}
+    for name, codes in QUERIES.items():
+        code = codes[1] if engine == "duckdb" else codes[0]
+        times = []
+        for _ in range(repeats):
+            namespace = {key: value.copy(deep=False) if hasattr(value, "copy") else value for key, value in frames.items()}
+            t0 = time.perf_counter()
+            exec(code, namespace)
+            times.append(time.perf_counter() - t0)
+        query_seconds[name] = float(np.median(times))
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "query_seconds": query_seconds,
+        "peak_rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": _peak_rss_mb(),
+    }))
+
+def _run_child(engine: str, data_dir: str, export_dir: str, repeats: int) -> dict:
+    env = dict(
+        os.environ,
+        GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "offline-benchmark"),
+        DATASET_PATH1=os.path.join(data_dir, "health_dataset1.csv"),
+        DATASET_PATH2=os.path.join(data_dir, "health_dataset2.csv"),
+        DATA_ENGINE=engine,
+        DATASET_SNAPSHOT_DIR=os.path.join(export_dir, "snapshots"),
+        DATASET_PARQUET_DIR=os.path.join(export_dir, "parquet"),
+        DATA_WATCH_INTERVAL_SECONDS="0",
+        OMP_NUM_THREADS="1", OPENBLAS_NUM_THREADS="1", MKL_NUM_THREADS="1",
+    )
+    command = [sys.executable, "-m", "benchmarks.bench_engines", "--child", engine, data_dir, "--repeats", str(repeats)]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    args = parse_args()
+    if args.child:
+        _child(*args.child, args.repeats)
+        return
+
+    from data_generator.synthetic import write_datasets
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_engines_")
+    engines = args.engines.split(",")
+    results = []
+    for scale in (int(s) for s in args.scales.split(",")):
+        data_dir = os.path.join(workdir, f"x{scale}")
+        n_patients = 2000 * scale
+        write_datasets(data_dir, n_patients=n_patients, n_days=args.days, chunk_size=20000)
+        csv_mb = sum(os.path.getsize(os.path.join(data_dir, f)) for f in os.listdir(data_dir)) / 2**20
+
+        print(f"\n== {scale}x: {n_patients} patients, {n_patients * args.days} activity rows, {csv_mb:.0f} MB of CSV")
+        for engine in engines:
+            export_dir = os.path.join(workdir, f"x{scale}-{engine}")
+            _run_child(engine, data_dir, export_dir, 1)  # Builds snapshots / Parquet exports
+            result = _run_child(engine, data_dir, export_dir, args.repeats)
+            results.append({"scale": scale, "engine": engine, "csv_mb": csv_mb, **result})
+
+            queries = "  ".join(f"{name} {seconds * 1e3:7.1f}" for name, seconds in result["query_seconds"].items())
+            print(f"   {engine:<7} load {result['load_seconds']:6.2f} s   peak RSS {result['peak_rss_after_load_mb']:7.0f} MB "
+                  f"after load, {result['peak_rss_mb']:7.0f} MB after queries")
+            print(f"           query ms  {queries}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
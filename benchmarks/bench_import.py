@@ -0,0 +1,73 @@
+"""
+Import-time benchmark: wall time and peak memory of a fresh interpreter importing each
+service module, plus the time until the app reports ready (the startup warm-up).
+
+Importing should be cheap and side-effect free (no dataset load, sandbox processes or LLM
+client); the heavy work happens in the warm-up, where independent steps run in parallel.
+
+Run from the project root:
+    python -m benchmarks.bench_import [--repeats 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+MODULES = ["config.config", "data_generator.data_loader", "orchestrator.tools", "orchestrator.agents",
+           "orchestrator.graph", "main"]
+
+# Runs in the child interpreter: imports one module (or starts the app) and reports timings
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+target = sys.argv[1]
+if target == "startup":
+    import asyncio
+    from fastapi.testclient import TestClient
+    import main
+    imported = time.perf_counter()
+    with TestClient(main.create_app()) as client:
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.01)
+else:
+    __import__(target)
+    imported = time.perf_counter()
+end = time.perf_counter()
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+print(json.dumps({"import_seconds": imported - start, "total_seconds": end - start, "peak_rss_mb": rss}))
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+def _measure(target: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", CHILD, target], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    args = parse_args()
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "offline-benchmark"))
+    env.setdefault("DATASET_PATH1", "")
+    env.setdefault("DATASET_PATH2", "")
+
+    results = {}
+    print(f"{'target':<28} {'import ms':>10} {'ready ms':>10} {'peak RSS MB':>12}")
+    for target in MODULES + ["startup"]:
+        runs = [_measure(target, env) for _ in range(args.repeats)]
+        results[target] = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+        ready = f"{results[target]['total_seconds'] * 1e3:10.0f}" if target == "startup" else f"{'':>10}"
+        print(f"{target:<28} {results[target]['import_seconds'] * 1e3:10.0f} {ready} {results[target]['peak_rss_mb']:12.0f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark for PHIRedactor: one scan per redaction tier (rules, email, numbers) vs. the previous
+implementation (one re.sub pass per rule/pattern), over synthetic clinical notes from 1 KB to 256 KB.
+
+Also checks that the output of both is identical for every note, for a randomized corpus of
+glued-together PHI fragments, for random strings over email and digit characters, and for
+REGRESSION_INPUTS; exits with status 1 on any difference.
+
+Run from the project root:  python -m benchmarks.bench_redactor
+"""
+import random
+import re
+import string
+import sys
+import time
+
+from security.phi_redactor import PHIRedactor
+
+SIZES_KB = [1, 4, 16, 64, 256]
+
+FRAGMENTS = [
+    "Patient reports intermittent headaches over the last 3 weeks.",
+    "BP 142/91, HR 78, SpO2 97% on room air.",
+    "Contact: jane.doe{n}@example-clinic.org for follow-up.",
+    "Call back at (555) 0{n:02d}-4477 or 555.201.{n:04d}.",
+    "SSN on file 123-45-{n:04d}; insurance verified.",
+    "DOB 04/{n:02d}/1961, admitted 2024-03-{n:02d}.",
+    "I am Robert and my name is Robert Smith.",
+    "Stated: my address is {n} Elm Street, Springfield",
+    "my ssn is 987 65 {n:04d}",
+    "Hemoglobin 13.2 g/dl, creatinine 1.1 mg/dl, eGFR 72.",
+    "Smoker, 10 pack-years, advised cessation. Alcohol 2 units/day.",
+    "Lab ref 4471-22 reviewed; steps/day averaged 6,{n:03d} last 10 days.",
+]
+
+# Inputs whose redaction once differed from the legacy passes (a single-pass engine leaked PHI)
+REGRESSION_INPUTS = [
+    "x@y.com952040009",   # the email replacement ends a word, so the SSN's \b matches after it
+    "62.22/490)7437359",  # PHONE runs before DOB and takes "490)7437359"
+    "[REDACTED_EMAIL]my ssn is 123-45-6789",
+    "a.b@c.demy ssn is 987 65 4321",
+]
+
+def legacy_redact(redactor: PHIRedactor, text: str) -> str:
+    """The previous algorithm: every rule, then every pattern, each as a separate re.sub pass."""
+    if not text:
+        return ""
+    for pattern, replacement in redactor.name_redaction_rules:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    for name, pattern in redactor.regex_patterns.items():
+        text = re.sub(pattern, redactor.redacted_template.format(name), text, flags=re.IGNORECASE)
+    return text
+
+def make_note(size_kb: int, rng: random.Random) -> str:
+    lines, size = [], 0
+    while size < size_kb * 1024:
+        line = rng.choice(FRAGMENTS).format(n=rng.randint(1, 28))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+def fuzz_corpus(rng: random.Random, count: int = 2000) -> list:
+    """Short strings that glue fragments together without separators to provoke overlapping matches."""
+    pieces = [fragment.format(n=rng.randint(1, 9999)) for fragment in FRAGMENTS]
+    pieces += ["I am", "my name is", "my ssn is", "my address is", "MY ", "i", "@", "-", " ", "\n", "12", "1234", "(555)", "x@y.io"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 8))) for _ in range(count)]
+
+def char_fuzz_corpus(rng: random.Random, count: int = 20000) -> list:
+    """Random strings over email and number characters, where boundaries and pass order matter."""
+    alphabet = string.digits * 4 + "xyz.@-/()_ " + "com"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(5, 30))) for _ in range(count)]
+
+def _best_time(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = random.Random(7)
+    redactor = PHIRedactor()
+
+    corpus = fuzz_corpus(rng) + char_fuzz_corpus(rng) + REGRESSION_INPUTS
+
+    print(f"{'note size':>10}{'legacy (ms)':>13}{'engine (ms)':>13}{'engine us/KB':>14}{'speedup':>9}")
+    for size_kb in SIZES_KB:
+        note = make_note(size_kb, rng)
+        corpus.append(note)
+        legacy = _best_time(lambda: legacy_redact(redactor, note))
+        engine = _best_time(lambda: redactor.redact_query(note))
+        print(f"{size_kb:>8}KB{legacy * 1e3:>13.2f}{engine * 1e3:>13.2f}{engine * 1e6 / size_kb:>14.1f}{legacy / engine:>8.1f}x")
+
+    query = "My name is John, DOB 04/12/1961. How many smokers over 60 have chronic kidney disease?"
+    legacy = _best_time(lambda: [legacy_redact(redactor, query) for _ in range(1000)])
+    engine = _best_time(lambda: [redactor.redact_query(query) for _ in range(1000)])
+    print(f"{'query':>10}{legacy:>13.3f}{engine:>13.3f}{'':>14}{legacy / engine:>8.1f}x   (per query, {len(query)} chars)")
+
+    queries = [make_note(1, rng) for _ in range(1000)]
+    legacy = _best_time(lambda: [legacy_redact(redactor, q) for q in queries], repeats=3)
+    batch = _best_time(lambda: redactor.redact_many(queries), repeats=3)
+    print(f"\nredact_many over 1000 x 1KB notes: {batch * 1e3:.1f} ms (legacy loop {legacy * 1e3:.1f} ms)")
+
+    differences = []
+    for text in corpus:
+        legacy_out, engine_out = legacy_redact(redactor, text), redactor.redact_query(text)
+        if legacy_out != engine_out:
+            differences.append((text, legacy_out, engine_out))
+
+    print(f"\nOutput vs. legacy over {len(corpus)} inputs: {len(corpus) - len(differences)} identical, "
+          f"{len(differences)} different")
+    for text, legacy_out, engine_out in differences[:5]:
+        print(f"  input:  {text!r}\n  legacy: {legacy_out!r}\n  engine: {engine_out!r}")
+    if differences:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Deterministic scripted chat model that stands in for ChatGroq in offline benchmarks.
+
+The analyst replays the tool calls recorded for each query in the corpus (one `code` entry per
+tool-call turn), then answers with the last tool output. The supervisor (only consulted when
+SUPERVISOR_MODE=llm) routes to the analyst until it has answered. Every call sleeps for the
+configured latency, so graph/REPL overhead can be measured on top of a realistic LLM delay.
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+DISCLAIMER = (
+    "❗️ **Disclaimer:** The following analysis is based on a hypothetical dataset and does not "
+    "constitute medical advice. Consult a qualified healthcare professional for any health concerns."
+)
+
+class ScriptedChatModel(BaseChatModel):
+    # Redacted query -> list of code strings, one per analyst tool-call turn
+    scripts: dict = {}
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+    tool_names: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, "name", None) or getattr(t, "__name__", str(t)) for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _delay(self, messages) -> float:
+        # Seeded per conversation state, so a run is reproducible regardless of scheduling
+        rng = random.Random(f"{self.seed}:{len(messages)}:{messages[-1].content}")
+        return max(self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms), 0.0) / 1000
+
+    def _tool_call(self, name: str, args: dict) -> AIMessage:
+        call_id = "call_" + uuid.uuid4().hex[:12]
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": args, "id": call_id}],
+            # graph.should_continue looks for raw tool calls in additional_kwargs, as Groq returns them
+            additional_kwargs={"tool_calls": [{
+                "id": call_id, "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }]},
+        )
+
+    def _respond(self, messages) -> AIMessage:
+        conversation = [m for m in messages if m.type != "system"]
+        last = conversation[-1]
+
+        if "RouterOutput" in self.tool_names:
+            answered = isinstance(last, AIMessage) and last.content and not last.tool_calls \
+                and not last.content.startswith("Routing to:")
+            return self._tool_call("RouterOutput", {"next_actor": "FINISH" if answered else "Data_Analyst"})
+
+        query = next(m.content for m in reversed(conversation) if isinstance(m, HumanMessage))
+        turn = sum(1 for m in conversation if isinstance(m, ToolMessage))
+        codes = self.scripts.get(query, [])
+        if turn < len(codes):
+            return self._tool_call(self.tool_names[0], {"code": codes[turn]})
+
+        result = last.content.strip() if isinstance(last, ToolMessage) else "No analysis was required."
+        return AIMessage(content=f"{DISCLAIMER}\n\nResult:\n{result}")
+
+    def _result(self, messages) -> ChatResult:
+        message = self._respond(messages)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": len(str(message.content)) // 4 + 20,
+            "total_tokens": prompt_tokens + len(str(message.content)) // 4 + 20,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self._delay(messages))
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self._delay(messages))
+        return self._result(messages)
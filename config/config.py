@@ -4,13 +4,91 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
+    # Checked when the LLM client is created (orchestrator.agents.get_primary_llm), not on import
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     #PRIMARY_MODEL_NAME = "llama-3.3-70b-versatile" 
     PRIMARY_MODEL_NAME = "openai/gpt-oss-20b"
     
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY not found in environment variables.")
-    
 
-    dataset_path1 = "/app/data/health_dataset1.csv"
-    dataset_path2 = "/app/data/health_dataset2.csv"
+    # Set both to "" to run on synthetic data generated at startup
+    dataset_path1 = os.getenv("DATASET_PATH1", "/app/data/health_dataset1.csv")
+    dataset_path2 = os.getenv("DATASET_PATH2", "/app/data/health_dataset2.csv")
+
+    # Typed columnar snapshots of the CSVs, memory-mapped on startup. Set to "" to always parse the CSVs.
+    snapshot_dir = os.getenv("DATASET_SNAPSHOT_DIR", "/app/data/.snapshots")
+    # "pandas" loads the datasets into memory; "duckdb" streams the CSVs to Parquet and queries them
+    # out of core, for datasets larger than RAM (requires the duckdb package)
+    DATA_ENGINE = os.getenv("DATA_ENGINE", "pandas").lower()
+    parquet_dir = os.getenv("DATASET_PARQUET_DIR", "/app/data/.parquet")
+    # Memory DuckDB may use per connection (API process and each sandbox worker) before spilling to disk
+    DUCKDB_MEMORY_LIMIT_MB = int(os.getenv("DUCKDB_MEMORY_LIMIT_MB", "1024"))
+    # Poll the dataset CSVs for changes (appended activity rows are applied incrementally); 0 disables.
+    # Not supported with API_WORKERS > 1, where the datasets are read-only
+    DATA_WATCH_INTERVAL_SECONDS = float(os.getenv("DATA_WATCH_INTERVAL_SECONDS", "0"))
+    # Token required in the X-Admin-Token header by the /admin endpoints; "" disables them
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+    # serve.py: API worker processes (they share one copy of the datasets) and the address to bind
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    API_HOST = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    # Startup warm-up: failed attempts are retried after WARM_UP_RETRY_SECONDS, doubling up to
+    # WARM_UP_RETRY_MAX_SECONDS; after WARM_UP_ATTEMPTS failures the process exits to be restarted
+    WARM_UP_ATTEMPTS = int(os.getenv("WARM_UP_ATTEMPTS", "5"))
+    WARM_UP_RETRY_SECONDS = float(os.getenv("WARM_UP_RETRY_SECONDS", "2"))
+    WARM_UP_RETRY_MAX_SECONDS = float(os.getenv("WARM_UP_RETRY_MAX_SECONDS", "60"))
+
+    # Log records go through a bounded queue to a background writer; when it is full they are
+    # dropped (health_log_records_dropped_total) rather than blocking the request
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of requests whose per-step DEBUG lines are logged even below LOG_LEVEL
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0"))
+
+    # Sandboxed execution of analyst code (python_repl_tool)
+    SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "2"))
+    SANDBOX_TIMEOUT_SECONDS = float(os.getenv("SANDBOX_TIMEOUT_SECONDS", "60"))
+    # Extra private memory one execution may allocate; 0 disables the limit
+    SANDBOX_MEMORY_LIMIT_MB = int(os.getenv("SANDBOX_MEMORY_LIMIT_MB", "2048"))
+    # Reuse python_repl_tool output for read-only, deterministic code already run on the same data
+    REPL_CACHE_ENABLED = os.getenv("REPL_CACHE_ENABLED", "true").lower() == "true"
+    REPL_CACHE_MAX_ENTRIES = int(os.getenv("REPL_CACHE_MAX_ENTRIES", "1024"))
+
+    # /analyze response cache (keyed on redacted query + dataset fingerprint + model)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    # SQLite file for a cache that survives restarts; "" keeps it in memory only
+    RESPONSE_CACHE_SQLITE_PATH = os.getenv("RESPONSE_CACHE_SQLITE_PATH", "")
+
+    # Conversation sessions (session_id on /analyze): dropped after SESSION_TTL_SECONDS idle or,
+    # least recently used first, beyond SESSION_MAX or while all sessions' REPL variables take more
+    # than SESSION_STORE_VARIABLES_MAX_MB; each keeps up to SESSION_VARIABLES_MAX_MB of REPL
+    # variables between calls and the messages of its latest SESSION_MAX_TURNS turns (0: all)
+    SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+    SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    SESSION_VARIABLES_MAX_MB = int(os.getenv("SESSION_VARIABLES_MAX_MB", "128"))
+    SESSION_STORE_VARIABLES_MAX_MB = int(os.getenv("SESSION_STORE_VARIABLES_MAX_MB", "1024"))
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "20"))
+
+    # Supervisor routing: "hybrid" resolves unambiguous states (new query, final analyst answer)
+    # locally and only calls the LLM otherwise; "llm" sends every routing decision to the LLM
+    SUPERVISOR_MODE = os.getenv("SUPERVISOR_MODE", "hybrid").lower()
+
+    # Client-side Groq limits shared by all graph executions; 0 disables a limit
+    GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "8000"))
+    # Retries of a rate-limited (429) LLM call, with exponential backoff from the base delay
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "2"))
+
+    # /analyze/batch: graph executions running at once across all batch jobs, and finished jobs kept for polling
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "100"))
+
+    # Estimated token budget for the message history sent with each LLM call (system prompt and
+    # schema excluded). Older tool outputs longer than TOOL_OUTPUT_KEEP_CHARS are always truncated;
+    # above the budget they are cut further and the oldest tool steps dropped.
+    LLM_HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_HISTORY_TOKEN_BUDGET", "4000"))
+    TOOL_OUTPUT_KEEP_CHARS = int(os.getenv("TOOL_OUTPUT_KEEP_CHARS", "1200"))
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+import duckdb
+import pandas as pd
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HEALTH_VIEW = "df_health"
+ACTIVITY_VIEW = "df_activity"
+PATIENT_ACTIVITY_VIEW = "df_patient_activity"
+
+# Same columns and semantics as data_loader._activity_stats/_align_patient_activity, one row per
+# df_health patient, both ordered by Patient_Number so materialized frames stay row-aligned
+PATIENT_ACTIVITY_SQL = f"""
+    SELECT h.Patient_Number,
+           s.Activity_Mean, coalesce(s.Activity_Sum, 0) AS Activity_Sum,
+           s.Activity_Min, s.Activity_Max, s.Activity_Std, s.Activity_Trend,
+           coalesce(s.Days_Observed, 0)::INTEGER AS Days_Observed
+    FROM {HEALTH_VIEW} h
+    LEFT JOIN (
+        SELECT Patient_Number,
+               avg(Physical_activity) AS Activity_Mean,
+               sum(Physical_activity)::DOUBLE AS Activity_Sum,
+               min(Physical_activity)::DOUBLE AS Activity_Min,
+               max(Physical_activity)::DOUBLE AS Activity_Max,
+               stddev_samp(Physical_activity) AS Activity_Std,
+               regr_slope(Physical_activity, Day_Number) AS Activity_Trend,
+               count(*) AS Days_Observed
+        FROM {ACTIVITY_VIEW}
+        GROUP BY Patient_Number
+    ) s USING (Patient_Number)
+    ORDER BY h.Patient_Number
+"""
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _parquet_name(csv_path: str) -> str:
+    """File name tied to the CSV's path, size and mtime, so a changed CSV never overwrites a file in use."""
+    stat = os.stat(csv_path)
+    source = f"{os.path.abspath(csv_path)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}"
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return f"{stem}-{hashlib.sha256(source.encode()).hexdigest()[:16]}.parquet"
+
+def export_csv(csv_path: str, parquet_dir: str) -> str:
+    """
+    Converts a CSV to Parquet with DuckDB's streaming reader (the CSV is never held in memory)
+    and returns the Parquet path. An existing export of the same CSV state is reused.
+    """
+    os.makedirs(parquet_dir, exist_ok=True)
+    parquet_path = os.path.join(parquet_dir, _parquet_name(csv_path))
+    if os.path.exists(parquet_path):
+        return parquet_path
+
+    logger.info(f"Exporting {csv_path} to {parquet_path}...")
+    tmp_path = parquet_path + ".tmp"
+    with duckdb.connect() as con:
+        con.execute(f"COPY (SELECT * FROM read_csv({_quote(csv_path)}, header = true)) "
+                    f"TO {_quote(tmp_path)} (FORMAT parquet)")
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def export_frame(df: pd.DataFrame, name: str, parquet_dir: str) -> str:
+    """Writes an in-memory frame (e.g. synthetic data) to Parquet, named by its content."""
+    os.makedirs(parquet_dir, exist_ok=True)
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:16]
+    parquet_path = os.path.join(parquet_dir, f"{name}-{digest}.parquet")
+    if not os.path.exists(parquet_path):
+        with duckdb.connect() as con:
+            con.register("frame", df)
+            con.execute(f"COPY frame TO {_quote(parquet_path + '.tmp')} (FORMAT parquet)")
+        os.replace(parquet_path + ".tmp", parquet_path)
+    return parquet_path
+
+def connect(paths: dict, memory_limit_mb: int = 0, threads: int = 0) -> duckdb.DuckDBPyConnection:
+    """
+    In-memory DuckDB connection with df_health, df_activity and df_patient_activity as views
+    over the Parquet files in `paths` (view name -> path). Queries stream from the files and
+    spill to disk beyond `memory_limit_mb` instead of loading the tables.
+    """
+    con = duckdb.connect()
+    if memory_limit_mb:
+        con.execute(f"SET memory_limit = '{int(memory_limit_mb)}MB'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    for view, path in paths.items():
+        # Ordered like df_patient_activity, so the per-patient tables are row-aligned when loaded
+        order = " ORDER BY Patient_Number" if view == HEALTH_VIEW else ""
+        con.execute(f"CREATE VIEW {view} AS SELECT * FROM read_parquet({_quote(path)}){order}")
+    con.execute(f"CREATE VIEW {PATIENT_ACTIVITY_VIEW} AS {PATIENT_ACTIVITY_SQL}")
+    return con
+
+def fingerprint(paths: dict) -> str:
+    """Dataset fingerprint: export file names already encode the source content or file state."""
+    names = "\x1f".join(f"{view}={os.path.basename(path)}" for view, path in sorted(paths.items()))
+    return hashlib.sha256(names.encode()).hexdigest()[:16]
+
+class ThreadCursors:
+    """
+    Per-thread cursors of one connection. A DuckDBPyConnection must not be used from several
+    threads at once (e.g. tool calls in executor threads, /schema and a reload); its cursors
+    are separate connections to the same database, so they see the same views.
+    """
+    def __init__(self, con: duckdb.DuckDBPyConnection):
+        self.con = con
+        self._local = threading.local()
+
+    def get(self) -> duckdb.DuckDBPyConnection:
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.con.cursor()
+        return cursor
+
+class LazyFrame:
+    """
+    Stand-in for a DataFrame backed by a DuckDB view. Row counts, columns, head() and column
+    selection (df["col"], df[["a", "b"]]) are answered by the engine and only read what they
+    need; any other pandas attribute materializes the whole table on first use. Queries run
+    on the calling thread's own cursor.
+    """
+    def __init__(self, con, view: str):
+        self._cursors = con if isinstance(con, ThreadCursors) else ThreadCursors(con)
+        self._view = view
+        self._df = None
+
+    @property
+    def _con(self) -> duckdb.DuckDBPyConnection:
+        return self._cursors.get()
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self._con.table(self._view).columns)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self), len(self.columns)
+
+    def __len__(self) -> int:
+        return self._con.execute(f"SELECT count(*) FROM {self._view}").fetchone()[0]
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        if self._df is not None:
+            return self._df.head(n)
+        return self._con.execute(f"SELECT * FROM {self._view} LIMIT {int(n)}").df()
+
+    def to_pandas(self) -> pd.DataFrame:
+        if self._df is None:
+            logger.info(f"Materializing {self._view} in memory")
+            self._df = self._con.execute(f"SELECT * FROM {self._view}").df()
+        return self._df
+
+    def copy(self, deep: bool = True):
+        """A fresh lazy frame over the same view: nothing materialized is shared."""
+        return LazyFrame(self._cursors, self._view)
+
+    def __getitem__(self, key):
+        if self._df is None and (isinstance(key, str) or (isinstance(key, list) and all(isinstance(k, str) for k in key))):
+            columns = [key] if isinstance(key, str) else key
+            unknown = [c for c in columns if c not in self.columns]
+            if unknown:
+                raise KeyError(unknown)
+            quoted = ", ".join('"' + c.replace('"', '""') + '"' for c in columns)
+            selected = self._con.execute(f"SELECT {quoted} FROM {self._view}").df()
+            return selected[key]
+        return self.to_pandas()[key]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.to_pandas(), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyFrame {self._view}: {len(self)} rows x {len(self.columns)} columns; use sql() to aggregate>"
+
+class ParquetFrames:
+    """
+    Sandbox counterpart of shared_frames.SharedFrames for the DuckDB engine: the manifest only
+    carries the Parquet paths, and each worker opens its own connection (attach_parquet).
+    The files belong to the DataManager, so closing releases nothing.
+    """
+    nbytes = 0
+
+    def __init__(self, paths: dict, memory_limit_mb: int = 0):
+        self.manifest = {"duckdb": {"paths": dict(paths), "memory_limit_mb": memory_limit_mb}}
+
+    def close(self):
+        pass
+
+def attach_parquet(spec: dict):
+    """
+    Worker side of ParquetFrames: returns (namespace entries, resources to close), like
+    shared_frames.attach_frames. Besides the lazy frames it provides sql(query) -> DataFrame.
+    """
+    # One thread per worker; the pool provides the parallelism
+    con = connect(spec["paths"], spec["memory_limit_mb"], threads=1)
+    cursors = ThreadCursors(con)
+
+    def sql(query: str) -> pd.DataFrame:
+        """Runs a DuckDB SQL query over df_health, df_activity and df_patient_activity."""
+        return cursors.get().execute(query).df()
+
+    frames = {view: LazyFrame(cursors, view) for view in (HEALTH_VIEW, ACTIVITY_VIEW, PATIENT_ACTIVITY_VIEW)}
+    return {**frames, "sql": sql}, [con]
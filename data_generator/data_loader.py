@@ -1,58 +1,496 @@
-import pandas as pd
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 import numpy as np
+import pandas as pd
 from config.config import Config
+from lazy import lazy_singleton
+from data_generator.synthetic import generate_datasets
+from data_generator.snapshot import load_csv_snapshot
+from data_generator.shared_frames import SharedFrames, ExportedFrames, attach_frames
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+ACTIVITY_COLUMNS = ["Patient_Number", "Day_Number", "Physical_activity"]
+ACTIVITY_KEY = ["Patient_Number", "Day_Number"]
+SHARED_FRAMES = ("df_health", "df_activity", "df_patient_activity")
+# Set by the launcher (serve.py) in multi-worker mode: path of the pickled shared-memory manifest
+SHARED_DATASET_ENV = "SHARED_DATASET_MANIFEST"
+
+# Version pinned by the request running in this context (see DataManager.pin)
+_pinned_version: ContextVar = ContextVar("pinned_dataset_version", default=None)
+
+def _content_fingerprint(*frames) -> str:
+    digest = hashlib.sha256()
+    for df in frames:
+        digest.update(repr(list(df.dtypes.items())).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def _activity_stats(df_activity: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-patient Physical_activity statistics indexed by Patient_Number.
+    Activity_Trend is the least-squares slope of steps over Day_Number (steps/day).
+    """
+    x = df_activity["Day_Number"].to_numpy(dtype=np.float64)
+    y = df_activity["Physical_activity"].to_numpy(dtype=np.float64)
+    sums = (
+        pd.DataFrame({"Patient_Number": df_activity["Patient_Number"].to_numpy(),
+                      "x": x, "y": y, "xx": x * x, "xy": x * y})
+        .groupby("Patient_Number")
+        .agg(n=("y", "count"), sx=("x", "sum"), sxx=("xx", "sum"), sxy=("xy", "sum"),
+             Activity_Mean=("y", "mean"), Activity_Sum=("y", "sum"), Activity_Min=("y", "min"),
+             Activity_Max=("y", "max"), Activity_Std=("y", "std"))
+    )
+    denominator = sums["n"] * sums["sxx"] - sums["sx"] ** 2
+    numerator = sums["n"] * sums["sxy"] - sums["sx"] * sums["Activity_Sum"]
+    sums["Activity_Trend"] = (numerator / denominator.where(denominator != 0)).astype(np.float64)
+    return sums
+
+def _align_patient_activity(stats: pd.DataFrame, df_health: pd.DataFrame) -> pd.DataFrame:
+    """
+    Materializes the per-patient statistics row-aligned with df_health (same index, same
+    patient order), so analysis code can combine them without a merge.
+    """
+    aggregates = stats.reindex(df_health["Patient_Number"].to_numpy())
+    return pd.DataFrame({
+        "Patient_Number": df_health["Patient_Number"].to_numpy(),
+        "Activity_Mean": aggregates["Activity_Mean"].to_numpy(),
+        "Activity_Sum": aggregates["Activity_Sum"].fillna(0).to_numpy(),
+        "Activity_Min": aggregates["Activity_Min"].to_numpy(),
+        "Activity_Max": aggregates["Activity_Max"].to_numpy(),
+        "Activity_Std": aggregates["Activity_Std"].to_numpy(),
+        "Activity_Trend": aggregates["Activity_Trend"].to_numpy(),
+        "Days_Observed": aggregates["n"].fillna(0).to_numpy(dtype=np.int32),
+    }, index=df_health.index)
+
+class DatasetVersion:
+    """
+    One immutable generation of the datasets. Updates build a new version; frames are never modified.
+    With the DuckDB engine, `parquet_paths` holds the files the tables are read from, df_activity
+    is a columnar.LazyFrame and there are no activity_stats (the aggregates come from SQL).
+    A version attached from another process's shared memory keeps that `shared` export.
+    """
+    def __init__(self, number: int, df_health: pd.DataFrame, df_activity,
+                 activity_stats: pd.DataFrame = None, fingerprint: str = None,
+                 df_patient_activity: pd.DataFrame = None, parquet_paths: dict = None, shared=None):
+        self.number = number
+        self.df_health = df_health
+        self.df_activity = df_activity
+        self.activity_stats = activity_stats
+        self.df_patient_activity = df_patient_activity if df_patient_activity is not None \
+            else _align_patient_activity(activity_stats, df_health)
+        self.parquet_paths = parquet_paths
+        self.shared = shared
+        self._fingerprint = fingerprint
+        self.pins = 0
+
+    @property
+    def fingerprint(self) -> str:
+        """Content fingerprint of the datasets (columns, dtypes and values), computed once."""
+        if self._fingerprint is None:
+            self._fingerprint = _content_fingerprint(self.df_health, self.df_activity)
+        return self._fingerprint
+
+    def describe(self) -> dict:
+        return {
+            "number": self.number,
+            "fingerprint": self.fingerprint,
+            "health_rows": len(self.df_health),
+            "activity_rows": len(self.df_activity),
+            "pins": self.pins,
+        }
+
 class DataManager:
-    def __init__(self,data_path1: str = None, data_path2: str = None):
-        self.df_health = pd.read_csv(data_path1) if data_path1 else None
-        self.df_activity = pd.read_csv(data_path2) if data_path2 else None
-        if self.df_health is None or self.df_activity is None:
-            self._generate_mock_data()
+    """
+    Versioned store for the datasets. Readers always see one consistent DatasetVersion: the
+    version pinned by their request (DataManager.pin), else the latest. Updates (appended
+    activity, upserted patients, reloads from the CSVs) build a new version off to the side,
+    notify subscribers (e.g. the sandbox exports it to shared memory) and then swap it in;
+    the previous version is retired once the last request pinned to it finishes.
+    """
+    def __init__(self,data_path1: str = None, data_path2: str = None, engine: str = "pandas"):
+        if engine not in ("pandas", "duckdb"):
+            raise ValueError(f"Unknown DATA_ENGINE {engine!r}; expected 'pandas' or 'duckdb'.")
+        self.data_path1 = data_path1
+        self.data_path2 = data_path2
+        self.engine = engine
+        # Versions attached from shared memory are owned by the launcher and cannot be replaced here
+        self.read_only = False
+        self._lock = threading.Lock()          # guards _current and pin counts
+        self._update_lock = threading.Lock()   # serializes writers
+        self._subscribers = []
+        self._file_state = {}
+        self._watcher = None
+
+        shared_manifest = os.environ.get(SHARED_DATASET_ENV)
+        if shared_manifest:
+            self._current = self._attach_shared(shared_manifest)
+            self.read_only = True
+            return
+        if engine == "duckdb":
+            # Exports of replaced versions are deleted once no request reads them
+            self.subscribe(on_retire=self._remove_exports)
+            self._current = self._build_parquet_version(0, self._export_parquet())
+        else:
+            df_health = self._load_dataset(data_path1)
+            df_activity = self._load_dataset(data_path2)
+            if df_health is None or df_activity is None:
+                df_health, df_activity = self._generate_mock_data()
+            self._current = self._build_version(0, df_health, df_activity)
+        self._remember_files()
+
+    def _load_dataset(self, data_path: str):
+        """Loads a CSV through its memory-mapped snapshot, falling back to a plain parse."""
+        if not data_path:
+            return None
+        if Config.snapshot_dir:
+            try:
+                return load_csv_snapshot(data_path, Config.snapshot_dir)
+            except OSError as e:
+                logger.warning(f"Snapshot unavailable for {data_path}, parsing CSV instead: {e}")
+        return pd.read_csv(data_path)
 
     def _generate_mock_data(self):
         logger.info("Starting synthetic data generation...")
-        np.random.seed(42)
-        n_patients = 2000
-        
-        #dataset1
-        self.df_health = pd.DataFrame({
-            'Patient_Number': range(1, n_patients + 1),
-            'Blood_Pressure_Abnormality': np.random.choice([0, 1], n_patients, p=[0.8, 0.2]), # 0=Normal, 1=Abnormal 
-            'Level_of_Hemoglobin': np.round(np.random.normal(14, 2, n_patients), 1),
-            'Genetic_Pedigree_Coefficient': np.random.uniform(0, 1, n_patients), # 0 to 1 scale [cite: 37]
-            'Age': np.random.randint(18, 90, n_patients),
-            'BMI': np.round(np.random.normal(25, 5, n_patients), 1),
-            'Sex': np.random.choice([0, 1], n_patients), # 0=Male, 1=Female 
-            'Pregnancy': np.zeros(n_patients),
-            'Smoking': np.random.choice([0, 1], n_patients),
-            'salt_content_in_the_diet': np.random.randint(1000, 5000, n_patients),
-            'alcohol_consumption_per_day': np.random.randint(0, 500, n_patients),
-            'Level_of_Stress': np.random.choice([1, 2, 3], n_patients), # 1=Low, 2=Normal, 3=High 
-            'Chronic_kidney_disease': np.random.choice([0, 1], n_patients, p=[0.9, 0.1]),
-            'Adrenal_and_thyroid_disorders': np.random.choice([0, 1], n_patients, p=[0.9, 0.1])
-        })
-        
-        # Logic Fixes (Males cannot be pregnant)
-        self.df_health.loc[self.df_health['Sex'] == 0, 'Pregnancy'] = 0
-        self.df_health.loc[(self.df_health['Sex'] == 1) & (np.random.rand(n_patients) > 0.95), 'Pregnancy'] = 1
-
-        logger.info(f"Generated Health Data: {n_patients} rows")
-        
-       #dataset2
-        records = []
-        for pid in range(1, n_patients + 1):
-            is_sick = self.df_health.loc[self.df_health['Patient_Number'] == pid, 'Chronic_kidney_disease'].values[0]
-            base = 3000 if is_sick else 7000
-            for d in range(1, 11):
-                steps = int(np.random.normal(base, 1500))
-                records.append([pid, d, max(0, steps)])
-                
-        self.df_activity = pd.DataFrame(records, columns=['Patient_Number', 'Day_Number', 'Physical_activity'])
-
-        logger.info(f"Generated Activity Data: {len(records)} rows")
+        df_health, df_activity = generate_datasets(n_patients=2000, n_days=10, seed=42)
+
+        logger.info(f"Generated Health Data: {len(df_health)} rows")
+        logger.info(f"Generated Activity Data: {len(df_activity)} rows")
+        return df_health, df_activity
+
+    # --- DuckDB engine ---
+
+    def _export_parquet(self) -> dict:
+        """Parquet files for the DuckDB views: the CSVs streamed to Parquet, or synthetic data."""
+        from data_generator import columnar
+        if self.data_path1 and self.data_path2:
+            return {columnar.HEALTH_VIEW: columnar.export_csv(self.data_path1, Config.parquet_dir),
+                    columnar.ACTIVITY_VIEW: columnar.export_csv(self.data_path2, Config.parquet_dir)}
+        df_health, df_activity = self._generate_mock_data()
+        return {columnar.HEALTH_VIEW: columnar.export_frame(df_health, "synthetic_health", Config.parquet_dir),
+                columnar.ACTIVITY_VIEW: columnar.export_frame(df_activity, "synthetic_activity", Config.parquet_dir)}
+
+    def _build_parquet_version(self, number: int, paths: dict) -> DatasetVersion:
+        """
+        Only the per-patient tables are materialized (df_health and the SQL-computed
+        df_patient_activity, both ordered by Patient_Number); df_activity stays on disk.
+        """
+        from data_generator import columnar
+        # Used directly only here, before the version is published; the LazyFrame then queries
+        # through a cursor per thread
+        con = columnar.connect(paths, Config.DUCKDB_MEMORY_LIMIT_MB)
+        df_health = con.execute(f"SELECT * FROM {columnar.HEALTH_VIEW}").df()
+        df_patient_activity = con.execute(f"SELECT * FROM {columnar.PATIENT_ACTIVITY_VIEW}").df()
+        version = DatasetVersion(
+            number, df_health, columnar.LazyFrame(con, columnar.ACTIVITY_VIEW),
+            fingerprint=columnar.fingerprint(paths), df_patient_activity=df_patient_activity, parquet_paths=paths,
+        )
+        logger.info(f"Built dataset version {number} on DuckDB: {len(df_health)} patients, activity read from {paths[columnar.ACTIVITY_VIEW]}")
+        return version
+
+    def _remove_exports(self, version: DatasetVersion):
+        in_use = set(self._current.parquet_paths.values())
+        for path in version.parquet_paths.values():
+            if path not in in_use:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _require_pandas_engine(self, operation: str):
+        self._require_writable(operation)
+        if self.engine != "pandas":
+            raise ValueError(f"{operation} is not supported with DATA_ENGINE={self.engine}: update the CSV files and reload.")
+
+    def _require_writable(self, operation: str):
+        if self.read_only:
+            raise ValueError(f"{operation} is not supported by a worker sharing the launcher's datasets: restart the service to load new data.")
+
+    # --- Multi-worker sharing ---
+
+    def share(self):
+        """
+        Exports the current version to shared memory for worker processes started from this one
+        (serve.py) and points them at it through SHARED_DATASET_ENV. This process switches to
+        read-only views of the export, so the data is held once in total. With the DuckDB
+        engine the manifest only names the Parquet exports, which the workers open themselves.
+        Either way this process and the workers become read-only: one worker replacing the
+        version would not reach the others, and would delete exports they still read.
+        Returns the SharedFrames to close after the workers exit (None with DuckDB).
+        """
+        version = self._current
+        shared = None
+        exported = {"number": version.number, "fingerprint": version.fingerprint}
+        if self.engine == "duckdb":
+            exported["parquet_paths"] = version.parquet_paths
+        else:
+            shared = SharedFrames({name: getattr(version, name) for name in SHARED_FRAMES})
+            exported["manifest"] = shared.manifest
+        fd, path = tempfile.mkstemp(prefix="health_datasets_", suffix=".manifest")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(exported, f)
+        os.environ[SHARED_DATASET_ENV] = path
+
+        self.read_only = True
+        if shared is None:
+            logger.info(f"Sharing dataset version {version.number} as Parquet exports")
+            return None
+        self._current = self._attach_shared(path)
+        logger.info(f"Exported dataset version {version.number} to shared memory ({shared.nbytes / 2**20:.1f} MB)")
+        return shared
+
+    def _attach_shared(self, manifest_path: str) -> DatasetVersion:
+        with open(manifest_path, "rb") as f:
+            exported = pickle.load(f)
+        if "parquet_paths" in exported:
+            # The launcher owns the exports: no on_retire subscription here, nothing is deleted
+            return self._build_parquet_version(exported["number"], exported["parquet_paths"])
+        frames, self._shared_blocks = attach_frames(exported["manifest"])
+        logger.info(f"Attached dataset version {exported['number']} from shared memory")
+        return DatasetVersion(
+            exported["number"], frames["df_health"], frames["df_activity"], fingerprint=exported["fingerprint"],
+            df_patient_activity=frames["df_patient_activity"], shared=ExportedFrames(exported["manifest"]),
+        )
+
+    def _build_version(self, number: int, df_health, df_activity, activity_stats=None, fingerprint=None):
+        if activity_stats is None:
+            activity_stats = _activity_stats(df_activity)
+        version = DatasetVersion(number, df_health, df_activity, activity_stats, fingerprint)
+        logger.info(f"Built dataset version {number}: {len(df_health)} patients, {len(df_activity)} activity rows")
+        return version
+
+    # --- Readers ---
+
+    @property
+    def current(self) -> DatasetVersion:
+        return _pinned_version.get() or self._current
+
+    @property
+    def df_health(self) -> pd.DataFrame:
+        return self.current.df_health
+
+    @property
+    def df_activity(self) -> pd.DataFrame:
+        return self.current.df_activity
+
+    @property
+    def df_patient_activity(self) -> pd.DataFrame:
+        return self.current.df_patient_activity
+
+    @property
+    def data_version(self) -> str:
+        """Content fingerprint of the datasets this context reads."""
+        return self.current.fingerprint
+
+    @contextmanager
+    def pin(self):
+        """
+        Runs the block (and the tasks and threads it starts) against the version that is current
+        on entry, even if a newer one is swapped in meanwhile. Nested pins reuse the outer version.
+        """
+        outer = _pinned_version.get()
+        if outer is not None:
+            yield outer
+            return
+
+        with self._lock:
+            version = self._current
+            version.pins += 1
+        _pinned_version.set(version)
+        try:
+            yield version
+        finally:
+            # set() rather than reset(): a streamed response may be closed from another context
+            _pinned_version.set(outer)
+            with self._lock:
+                version.pins -= 1
+                retire = version is not self._current and version.pins == 0
+            if retire:
+                self._notify("retire", version)
+
+    # --- Writers ---
+
+    def subscribe(self, on_publish=None, on_retire=None):
+        """
+        Registers callbacks taking a DatasetVersion: on_publish runs before a version becomes
+        current, on_retire once a replaced version is no longer used by any request.
+        """
+        self._subscribers.append((on_publish, on_retire))
+
+    def _notify(self, event: str, version: DatasetVersion):
+        for on_publish, on_retire in self._subscribers:
+            callback = on_publish if event == "publish" else on_retire
+            if callback:
+                callback(version)
+
+    def _publish(self, version: DatasetVersion) -> DatasetVersion:
+        self._notify("publish", version)
+        with self._lock:
+            previous, self._current = self._current, version
+            retire = previous.pins == 0
+        if retire:
+            self._notify("retire", previous)
+        logger.info(f"Dataset version {version.number} is now current (was {previous.number}).")
+        return version
+
+    @staticmethod
+    def _derived_fingerprint(base: DatasetVersion, operation: str, rows: pd.DataFrame) -> str:
+        """Fingerprint of an incremental update: the base version plus a hash of the change only."""
+        digest = hashlib.sha256(f"{base.fingerprint}\x1f{operation}".encode())
+        digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    def append_activity(self, rows: pd.DataFrame) -> DatasetVersion:
+        """
+        Adds activity rows (Patient_Number, Day_Number, Physical_activity). A row for an existing
+        (patient, day) replaces it. Only the affected patients' aggregates are recomputed.
+        """
+        self._require_pandas_engine("Appending activity rows")
+        _check_columns(rows, ACTIVITY_COLUMNS, "activity")
+        rows = rows[ACTIVITY_COLUMNS].drop_duplicates(ACTIVITY_KEY, keep="last").reset_index(drop=True)
+
+        with self._update_lock:
+            base = self._current
+            old = base.df_activity
+            rows = _cast_rows(rows, old, "activity")
+            replaced = pd.MultiIndex.from_frame(old[ACTIVITY_KEY]).isin(pd.MultiIndex.from_frame(rows[ACTIVITY_KEY]))
+            df_activity = pd.concat([old[~replaced], rows], ignore_index=True)
+
+            affected = rows["Patient_Number"].unique()
+            stats = pd.concat([
+                base.activity_stats.drop(affected, errors="ignore"),
+                _activity_stats(df_activity[df_activity["Patient_Number"].isin(affected)]),
+            ]).sort_index()
+
+            version = self._build_version(
+                base.number + 1, base.df_health, df_activity, stats,
+                self._derived_fingerprint(base, "activity", rows),
+            )
+            return self._publish(version)
+
+    def upsert_health(self, rows: pd.DataFrame) -> DatasetVersion:
+        """
+        Replaces the df_health rows of the given patients in place and appends unknown patients.
+        Activity aggregates are only re-aligned, not recomputed.
+        """
+        self._require_pandas_engine("Upserting health rows")
+        with self._update_lock:
+            base = self._current
+            old = base.df_health
+            _check_columns(rows, list(old.columns), "health")
+            rows = rows[list(old.columns)].drop_duplicates("Patient_Number", keep="last").reset_index(drop=True)
+            rows = _cast_rows(rows, old, "health")
+
+            positions = pd.Index(old["Patient_Number"]).get_indexer(rows["Patient_Number"])
+            existing = positions >= 0
+            # Row order of the result: old rows, with updated patients taken from `rows`, then new patients
+            take = np.arange(len(old))
+            take[positions[existing]] = len(old) + np.flatnonzero(existing)
+            take = np.concatenate([take, len(old) + np.flatnonzero(~existing)])
+            df_health = pd.concat([old, rows], ignore_index=True).take(take).reset_index(drop=True)
+
+            version = self._build_version(
+                base.number + 1, df_health, base.df_activity, base.activity_stats,
+                self._derived_fingerprint(base, "health", rows),
+            )
+            return self._publish(version)
+
+    def reload(self) -> DatasetVersion:
+        """Reloads both datasets from their CSV files as a new version."""
+        self._require_writable("Reloading")
+        if not (self.data_path1 and self.data_path2):
+            raise ValueError("No dataset files are configured (running on synthetic data).")
+        with self._update_lock:
+            number = self._current.number + 1
+            if self.engine == "duckdb":
+                version = self._build_parquet_version(number, self._export_parquet())
+            else:
+                version = self._build_version(number, self._load_dataset(self.data_path1), self._load_dataset(self.data_path2))
+            self._remember_files()
+            return self._publish(version)
+
+    # --- File watcher ---
+
+    TAIL_BYTES = 65536
+
+    def _file_tail_hash(self, path: str, size: int) -> str:
+        with open(path, "rb") as f:
+            f.seek(max(size - self.TAIL_BYTES, 0))
+            return hashlib.sha256(f.read(min(size, self.TAIL_BYTES))).hexdigest()
+
+    def _remember_files(self):
+        for path in (self.data_path1, self.data_path2):
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                self._file_state[path] = (stat.st_size, stat.st_mtime_ns, self._file_tail_hash(path, stat.st_size))
+
+    def _read_appended_activity(self, path: str, old_size: int, new_size: int):
+        """Rows appended to the activity CSV since old_size (complete lines only), or None if it was rewritten."""
+        if self._file_tail_hash(path, old_size) != self._file_state[path][2]:
+            return None, old_size
+        with open(path, "rb") as f:
+            f.seek(old_size)
+            tail = f.read(new_size - old_size)
+        complete = tail.rfind(b"\n") + 1  # A writer may still be appending the last line
+        if complete == 0:
+            return pd.DataFrame(columns=ACTIVITY_COLUMNS), old_size
+        rows = pd.read_csv(io.BytesIO(tail[:complete]), header=None, names=ACTIVITY_COLUMNS)
+        return rows, old_size + complete
+
+    def check_files(self):
+        """
+        Picks up changes to the dataset CSVs: rows appended to the activity file are applied
+        incrementally; any other change reloads the affected dataset.
+        """
+        changed = []
+        for path in (self.data_path1, self.data_path2):
+            if not path or not os.path.exists(path) or path not in self._file_state:
+                continue
+            stat = os.stat(path)
+            size, mtime_ns, _ = self._file_state[path]
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                changed.append((path, size, stat.st_size))
+        if not changed:
+            return None
+
+        appended = len(changed) == 1 and changed[0][0] == self.data_path2 and changed[0][2] > changed[0][1]
+        if appended and self.engine == "pandas":
+            path, old_size, new_size = changed[0]
+            rows, consumed = self._read_appended_activity(path, old_size, new_size)
+            if rows is not None:
+                if rows.empty:
+                    return None
+                logger.info(f"Appending {len(rows)} new activity rows from {path}")
+                version = self.append_activity(rows)
+                self._file_state[path] = (consumed, os.stat(path).st_mtime_ns, self._file_tail_hash(path, consumed))
+                return version
+
+        logger.info(f"Dataset files changed ({', '.join(c[0] for c in changed)}); reloading.")
+        return self.reload()
+
+    def watch(self, interval_seconds: float):
+        """Starts a daemon thread that calls check_files every interval_seconds."""
+        if self._watcher is not None or self.read_only or not (self.data_path1 and self.data_path2):
+            return
+
+        def run():
+            while True:
+                threading.Event().wait(interval_seconds)
+                try:
+                    self.check_files()
+                except Exception as e:
+                    logger.error(f"Dataset watcher failed to apply file changes: {e}")
+
+        self._watcher = threading.Thread(target=run, name="dataset-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching dataset files every {interval_seconds}s.")
 
     def get_schema_context(self) -> str:
         schema = """
@@ -76,7 +514,49 @@ class DataManager:
         - Patient_Number: (int) Foreign Key
         - Day_Number: (int) 1 to 10
         - Physical_activity: (int) Steps per day in last 10 days
+
+        DATASET 3: df_patient_activity (Precomputed - One row per patient, row-aligned with df_health)
+        - Same index and row order as df_health, so its columns can be assigned directly
+          (e.g. df_health["Activity_Mean"] = df_patient_activity["Activity_Mean"]) without a merge
+        - Patient_Number: (int) Same value as df_health.Patient_Number on each row
+        - Activity_Mean / Activity_Sum / Activity_Min / Activity_Max: (float) Physical_activity over observed days
+        - Activity_Std: (float) Sample standard deviation of Physical_activity (NaN with fewer than 2 days)
+        - Activity_Trend: (float) Least-squares slope of Physical_activity vs Day_Number (steps per day)
+        - Days_Observed: (int) Number of activity rows for the patient (0 if none; other columns NaN)
+        """
+        if self.engine == "duckdb":
+            schema += """
+        QUERY ENGINE: DuckDB over Parquet (df_activity is too large to load into memory)
+        - The three datasets are SQL views with the names above; `sql(query)` runs DuckDB SQL and returns a pandas DataFrame
+        - In Python they are lazy frames: len(), .columns, .head(n) and column selection (df["col"]) read only what they need;
+          any other pandas operation loads the whole table
+        - df_health and df_patient_activity are ordered by Patient_Number and stay row-aligned when loaded
         """
         return schema
 
-data_manager = DataManager(Config.dataset_path1, Config.dataset_path2)
\ No newline at end of file
+
+def _check_columns(rows: pd.DataFrame, expected: list, dataset: str):
+    missing = [c for c in expected if c not in rows.columns]
+    if missing:
+        raise ValueError(f"New {dataset} rows are missing column(s): {missing}")
+
+def _cast_rows(rows: pd.DataFrame, like: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Casts new rows to the dtypes of the stored frame, so an update cannot turn a numeric column into object."""
+    try:
+        return rows.astype(like.dtypes[rows.columns].to_dict())
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"New {dataset} rows do not match the column types: {e}") from e
+
+@lazy_singleton
+def get_data_manager() -> DataManager:
+    """The process-wide DataManager, loaded on first use (normally by the startup warm-up)."""
+    manager = DataManager(Config.dataset_path1, Config.dataset_path2, Config.DATA_ENGINE)
+    if Config.DATA_WATCH_INTERVAL_SECONDS > 0:
+        manager.watch(Config.DATA_WATCH_INTERVAL_SECONDS)
+    return manager
+
+def __getattr__(name: str):
+    # `data_loader.data_manager` still works, but loads the datasets on first access
+    if name == "data_manager":
+        return get_data_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,101 @@
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+
+class SharedFrames:
+    """
+    Copies a set of DataFrames column by column into POSIX shared memory.
+    `manifest` is a small picklable description that other processes pass to
+    `attach_frames` to get zero-copy, read-only views of the same data.
+    """
+    def __init__(self, frames: dict):
+        self._blocks = []
+        self.manifest = {}
+        for frame_name, df in frames.items():
+            columns = []
+            for col in df.columns:
+                values = df[col].to_numpy()
+                if values.dtype == object:
+                    # Object columns hold Python objects and cannot live in a flat buffer
+                    columns.append({"name": col, "values": values})
+                    continue
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                self._blocks.append(shm)
+                columns.append({"name": col, "shm": shm.name, "dtype": values.dtype.str, "length": len(values)})
+
+            is_default_index = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+            self.manifest[frame_name] = {"columns": columns, "index": None if is_default_index else df.index}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._blocks)
+
+    def close(self):
+        """Releases and unlinks every block. Attached processes keep their mappings until they exit."""
+        for shm in self._blocks:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+# Serializes the resource_tracker.register swap in _attach_block (before Python 3.13)
+_register_lock = threading.Lock()
+
+def _attach_block(name: str) -> shared_memory.SharedMemory:
+    """Attaches without handing ownership to this process's resource tracker (owner unlinks)."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block, and the tracker would unlink it when we exit.
+    # Skip the registration rather than undo it: processes started with multiprocessing share
+    # the owner's tracker, and unregistering would drop the owner's own registration. The
+    # swapped function is process-global, so it only skips this block's registration.
+    with _register_lock:
+        register = resource_tracker.register
+        skip = lambda tracked, rtype: rtype == "shared_memory" and tracked.lstrip("/") == name.lstrip("/")
+        resource_tracker.register = lambda tracked, rtype: None if skip(tracked, rtype) else register(tracked, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+def attach_frames(manifest: dict):
+    """
+    Rebuilds the DataFrames described by a SharedFrames manifest without copying.
+    Returns (frames, blocks); keep `blocks` referenced for as long as the frames are in use.
+    """
+    frames, blocks = {}, []
+    for frame_name, spec in manifest.items():
+        data = {}
+        for column in spec["columns"]:
+            if "shm" not in column:
+                data[column["name"]] = column["values"]
+                continue
+            shm = _attach_block(column["shm"])
+            blocks.append(shm)
+            values = np.ndarray((column["length"],), dtype=np.dtype(column["dtype"]), buffer=shm.buf)
+            values.flags.writeable = False
+            data[column["name"]] = values
+        frames[frame_name] = pd.DataFrame(data, index=spec["index"], copy=False)
+    return frames, blocks
+
+class ExportedFrames:
+    """
+    Frames another process exported with SharedFrames, described by its manifest. Lets this
+    process hand the same blocks on (e.g. to the sandbox) without copying; the exporting
+    process owns the blocks, so closing releases nothing.
+    """
+    def __init__(self, manifest: dict):
+        self.manifest = manifest
+
+    @property
+    def nbytes(self) -> int:
+        return sum(np.dtype(column["dtype"]).itemsize * column["length"]
+                   for spec in self.manifest.values() for column in spec["columns"] if "shm" in column)
+
+    def close(self):
+        pass
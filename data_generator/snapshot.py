@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 2: columns keep the dtypes pandas infers from the CSV (version 1 downcast integers)
+SNAPSHOT_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Content hash of a source file, streamed so large CSVs are not read into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_manifest(snapshot_path: str):
+    try:
+        with open(os.path.join(snapshot_path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return manifest
+
+def _write_manifest(snapshot_path: str, manifest: dict):
+    tmp_path = os.path.join(snapshot_path, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_path, MANIFEST_NAME))
+
+def _source_stat(csv_path: str) -> dict:
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _is_current(manifest: dict, snapshot_path: str, csv_path: str) -> bool:
+    """
+    Validates a snapshot against its source CSV. Size + mtime is the fast path; when those
+    differ (e.g. the file was copied or touched) the content hash decides.
+    """
+    source = manifest["source"]
+    current = _source_stat(csv_path)
+    if source["size"] == current["size"] and source["mtime_ns"] == current["mtime_ns"]:
+        return True
+    if source["size"] != current["size"] or file_sha256(csv_path) != source["sha256"]:
+        return False
+
+    # Same content, new mtime: refresh the stat so the next start takes the fast path
+    manifest["source"].update(current)
+    _write_manifest(snapshot_path, manifest)
+    return True
+
+def build_snapshot(csv_path: str, snapshot_path: str) -> dict:
+    """Parses the CSV once and writes one .npy file per column plus a manifest."""
+    logger.info(f"Building columnar snapshot for {csv_path}...")
+    # Same dtypes as a CSV load, so analysis code gets the same results (no narrowed integers to overflow)
+    df = pd.read_csv(csv_path)
+
+    tmp_path = f"{snapshot_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        file_name = f"col_{i:03d}.npy"
+        np.save(os.path.join(tmp_path, file_name), values, allow_pickle=values.dtype == object)
+        columns.append({"name": col, "file": file_name, "dtype": str(values.dtype)})
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source": {**_source_stat(csv_path), "sha256": file_sha256(csv_path)},
+        "rows": len(df),
+        "columns": columns,
+    }
+    _write_manifest(tmp_path, manifest)
+
+    # Swap the finished directory in; readers never see a half-written snapshot
+    shutil.rmtree(snapshot_path, ignore_errors=True)
+    os.replace(tmp_path, snapshot_path)
+    logger.info(f"Snapshot written: {snapshot_path} ({len(df)} rows, {len(columns)} columns)")
+    return manifest
+
+def open_snapshot(snapshot_path: str, manifest: dict) -> pd.DataFrame:
+    """
+    Memory-maps every column. Pages are loaded on demand and shared with other processes
+    mapping the same files; writes from analysis code go to private copy-on-write pages.
+    """
+    data = {}
+    for column in manifest["columns"]:
+        path = os.path.join(snapshot_path, column["file"])
+        if column["dtype"] == "object":
+            # Object columns cannot be memory-mapped
+            data[column["name"]] = np.load(path, allow_pickle=True)
+        else:
+            # asarray drops the memmap subclass; the mapping stays alive through .base
+            data[column["name"]] = np.asarray(np.load(path, mmap_mode="c"))
+    return pd.DataFrame(data, copy=False)
+
+def load_csv_snapshot(csv_path: str, snapshot_dir: str) -> pd.DataFrame:
+    """
+    Returns the CSV's contents as a DataFrame backed by a memory-mapped columnar snapshot,
+    (re)building the snapshot only when the source CSV changed.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    snapshot_path = os.path.join(snapshot_dir, name)
+
+    manifest = _read_manifest(snapshot_path)
+    if manifest is None or not _is_current(manifest, snapshot_path, csv_path):
+        os.makedirs(snapshot_dir, exist_ok=True)
+        manifest = build_snapshot(csv_path, snapshot_path)
+    else:
+        logger.info(f"Using columnar snapshot for {csv_path}")
+
+    return open_snapshot(snapshot_path, manifest)
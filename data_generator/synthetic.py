@@ -0,0 +1,115 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+HEALTH_FILE_NAME = "health_dataset1.csv"
+ACTIVITY_FILE_NAME = "health_dataset2.csv"
+
+def _health_frame(rng: np.random.RandomState, first_patient: int, n_patients: int) -> pd.DataFrame:
+    """Draws dataset1 columns. Draw order matches the original generator so seeded output is unchanged."""
+    df_health = pd.DataFrame({
+        'Patient_Number': np.arange(first_patient, first_patient + n_patients, dtype=np.int64),
+        'Blood_Pressure_Abnormality': rng.choice([0, 1], n_patients, p=[0.8, 0.2]), # 0=Normal, 1=Abnormal
+        'Level_of_Hemoglobin': np.round(rng.normal(14, 2, n_patients), 1),
+        'Genetic_Pedigree_Coefficient': rng.uniform(0, 1, n_patients), # 0 to 1 scale
+        'Age': rng.randint(18, 90, n_patients),
+        'BMI': np.round(rng.normal(25, 5, n_patients), 1),
+        'Sex': rng.choice([0, 1], n_patients), # 0=Male, 1=Female
+        'Pregnancy': np.zeros(n_patients),
+        'Smoking': rng.choice([0, 1], n_patients),
+        'salt_content_in_the_diet': rng.randint(1000, 5000, n_patients),
+        'alcohol_consumption_per_day': rng.randint(0, 500, n_patients),
+        'Level_of_Stress': rng.choice([1, 2, 3], n_patients), # 1=Low, 2=Normal, 3=High
+        'Chronic_kidney_disease': rng.choice([0, 1], n_patients, p=[0.9, 0.1]),
+        'Adrenal_and_thyroid_disorders': rng.choice([0, 1], n_patients, p=[0.9, 0.1])
+    })
+
+    # Logic Fixes (Males cannot be pregnant)
+    is_female = df_health['Sex'].to_numpy() == 1
+    df_health.loc[~is_female, 'Pregnancy'] = 0
+    df_health.loc[is_female & (rng.rand(n_patients) > 0.95), 'Pregnancy'] = 1
+    return df_health
+
+def _activity_frame(rng: np.random.RandomState, df_health: pd.DataFrame, n_days: int) -> pd.DataFrame:
+    """
+    Draws dataset2 (n_days rows per patient) in one vectorized call.
+    Element order is patient-major, day-minor, i.e. the same stream the per-row loop consumed.
+    """
+    is_sick = df_health['Chronic_kidney_disease'].to_numpy() == 1
+    base = np.where(is_sick, 3000, 7000)
+
+    steps = rng.normal(np.repeat(base, n_days), 1500)
+    # int() truncates toward zero, as astype does
+    steps = np.maximum(steps.astype(np.int64), 0)
+
+    return pd.DataFrame({
+        'Patient_Number': np.repeat(df_health['Patient_Number'].to_numpy(), n_days),
+        'Day_Number': np.tile(np.arange(1, n_days + 1, dtype=np.int64), len(df_health)),
+        'Physical_activity': steps,
+    })
+
+def generate_datasets(n_patients: int = 2000, n_days: int = 10, seed: int = 42):
+    """
+    Generates (df_health, df_activity) in memory.
+    With the defaults this reproduces the original 2000-patient / 10-day datasets exactly.
+    """
+    rng = np.random.RandomState(seed)
+    df_health = _health_frame(rng, 1, n_patients)
+    df_activity = _activity_frame(rng, df_health, n_days)
+    return df_health, df_activity
+
+def write_datasets(out_dir: str, n_patients: int = 2000, n_days: int = 10, seed: int = 42, chunk_size: int = None):
+    """
+    Writes both datasets as CSV into out_dir and returns their paths.
+
+    With chunk_size set, patients are generated and appended chunk by chunk so peak memory is
+    bounded by one chunk (chunk_size * n_days activity rows). Each chunk draws from its own
+    stream spawned from `seed`, so output is deterministic for a given (seed, chunk_size) but
+    differs from the in-memory layout.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    health_path = os.path.join(out_dir, HEALTH_FILE_NAME)
+    activity_path = os.path.join(out_dir, ACTIVITY_FILE_NAME)
+
+    if not chunk_size or chunk_size >= n_patients:
+        df_health, df_activity = generate_datasets(n_patients, n_days, seed)
+        df_health.to_csv(health_path, index=False)
+        df_activity.to_csv(activity_path, index=False)
+        logger.info(f"Wrote {len(df_health)} health rows and {len(df_activity)} activity rows to {out_dir}")
+        return health_path, activity_path
+
+    n_chunks = -(-n_patients // chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    for i, chunk_seed in enumerate(chunk_seeds):
+        first_patient = i * chunk_size + 1
+        size = min(chunk_size, n_patients - i * chunk_size)
+        rng = np.random.RandomState(np.random.MT19937(chunk_seed))
+
+        df_health = _health_frame(rng, first_patient, size)
+        df_activity = _activity_frame(rng, df_health, n_days)
+
+        mode, header = ("w", True) if i == 0 else ("a", False)
+        df_health.to_csv(health_path, index=False, mode=mode, header=header)
+        df_activity.to_csv(activity_path, index=False, mode=mode, header=header)
+        logger.info(f"Wrote chunk {i + 1}/{n_chunks} (patients {first_patient}-{first_patient + size - 1})")
+
+    return health_path, activity_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic health datasets.")
+    parser.add_argument("--out", default="data", help="Output directory")
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=10, help="Activity rows per patient")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=None, help="Patients per chunk; streams to disk when set")
+    args = parser.parse_args()
+
+    write_datasets(args.out, args.patients, args.days, args.seed, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
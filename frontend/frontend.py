@@ -3,89 +3,164 @@ import requests
 import json
 import pandas as pd
 import os
+import uuid
+from requests.adapters import HTTPAdapter
 
 API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+# (connect, read) in seconds; when streaming, the read timeout bounds the wait for the next event
+TIMEOUT = (float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5")), float(os.getenv("BACKEND_READ_TIMEOUT", "120")))
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled keep-alive session per frontend process, shared by all reruns and users."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(os.getenv("BACKEND_POOL_SIZE", "10")))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_schema() -> dict:
+    """Datasets and sample queries from GET /schema; failures are not cached, so the next rerun retries."""
+    response = get_session().get(f"{API_URL}/schema", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def stream_analysis(query: str, session_id: str | None):
+    """Yields the NDJSON events of POST /analyze/stream as they arrive."""
+    payload = {"query": query}
+    # Without a session each question stands alone and can be answered from the backend's cache
+    if session_id:
+        payload["session_id"] = session_id
+    with get_session().post(f"{API_URL}/analyze/stream", json=payload, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code != 200:
+            yield {"event": "error", "detail": f"Error {response.status_code}: {response.text}"}
+            return
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def render_step(event: dict):
+    """Renders one completed graph step (a 'node' event)."""
+    node, content = event["node"], event["content"]
+    if node == "Supervisor":
+        st.markdown(f"**👮 Supervisor:** {content}")
+    elif node == "Data_Analyst":
+        st.markdown(f"**👨‍💻 Analyst:**")
+        tool_calls = event.get("tool_calls", [])
+        if content != "[Tool Call]" or not tool_calls:
+            st.markdown(content)
+        for call in tool_calls:
+            if "code" in call["args"]:
+                st.code(call["args"]["code"], language="python")
+            else:
+                st.markdown(f"`{call['name']}` `{json.dumps(call['args'])}`")
+    elif node == "tools":
+        st.markdown(f"**⚙️ Tool Output:**")
+        st.code(content, language=None)
+    else:
+        st.text(f"{node}: {content}")
+
+def use_sample(sample: str):
+    st.session_state["query"] = sample
+
+def new_conversation():
+    # The old conversation expires on the backend by itself
+    st.session_state["conversation_id"] = uuid.uuid4().hex
+
+# With "Continue conversation" on, follow-up questions continue the backend session:
+# earlier answers and computed variables are reused
+if "conversation_id" not in st.session_state:
+    new_conversation()
 
 st.set_page_config(
     page_title="GenAI Health Analyst",
     layout="wide"
 )
+
+try:
+    schema = fetch_schema()
+except requests.exceptions.RequestException:
+    schema = None
+# Sample queries come from the backend only; none are offered while it is unreachable
+sample_queries = schema["sample_queries"] if schema else []
+
 with st.sidebar:
     st.title("🏥 Health Analytics System")
     st.markdown("---")
+    continue_conversation = st.toggle(
+        "💬 Continue conversation", key="continue_conversation",
+        help="Answer follow-up questions using the earlier questions and results. When off, each question stands alone and repeated questions are answered from the cache.",
+    )
+    st.button("🆕 New conversation", on_click=new_conversation, disabled=not continue_conversation, help="Start over without the earlier questions and results.")
+    st.markdown("---")
     st.subheader("Available Datasets")
     with st.expander("View Data Schema"):
-        st.markdown("""
-        **Dataset 1: Health Metrics**
-        - `Blood_Pressure_Abnormality`: 0/1
-        - `BMI`, `Age`, `Hemoglobin`, `Stress`
-        - `Chronic_kidney_disease`: 0/1
-        
-        **Dataset 2: Activity (Longitudinal)**
-        - `Physical_activity` (steps)
-        - `Day_Number` (1-10)
-        """)
+        if schema:
+            for name, dataset in schema["datasets"].items():
+                st.markdown(f"**{name}** ({dataset['rows']:,} rows)")
+                st.dataframe(pd.DataFrame({"column": dataset["columns"]}), hide_index=True)
+            st.caption(f"Dataset version {schema['data_version']}")
+        else:
+            st.caption("Schema unavailable: the backend is not reachable yet.")
 
 st.title("🧬 Intelligent Health Data Analyst")
 st.markdown(
     """
-    Ask complex questions about patient demographics, lifestyle factors, and disease outcomes. 
+    Ask complex questions about patient demographics, lifestyle factors, and disease outcomes.
     *The system performs real-time statistical analysis on the fly.*
     """
 )
 
-#sample queries
-sample_queries = [
-    "How many people who smoke have chronic kidney disease?",
-    "What is the correlation between BMI and Stress Level?",
-    "Does physical activity in the last 10 days differ for patients with Kidney Disease?"
-]
-
-query = st.text_area("Enter your analytical question:", height=100, placeholder="e.g., " + sample_queries[0])
+placeholder = "e.g., " + sample_queries[0] if sample_queries else None
+query = st.text_area("Enter your analytical question:", key="query", height=100, placeholder=placeholder)
 
-cols = st.columns(len(sample_queries))
+if sample_queries:
+    cols = st.columns(len(sample_queries))
+    for col, sample in zip(cols, sample_queries):
+        col.button(sample, on_click=use_sample, args=(sample,), width="stretch")
 
 if st.button("🔍 Analyze Data", type="primary"):
     if not query:
         st.warning("Please enter a question first.")
     else:
         st.markdown(f"**running analysis for:** _{query}_")
-        
-        status_container = st.empty()
-        
+
+        # Steps appear as each graph node completes; LLM text is shown while it is generated
+        status = st.status("Orchestrating Agents...", expanded=True)
+        result_container = st.container()
+
         try:
-            with st.spinner("Orchestrating Agents..."):
-                payload = {"query": query}
-                FULL_URL = f"{API_URL}/analyze"
-                response = requests.post(FULL_URL, json=payload)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    final_answer = result.get("response", "No response provided.")
-                    trace_logs = result.get("trace", [])
-                    
-                    st.success("### Analysis Result")
-                    st.markdown(final_answer)
-                    
-                    with st.expander("🛠️ View Agent 'Thought Process' & Code Execution"):
-                        for log in trace_logs:
-                            if "Data_Analyst" in log:
-                                st.markdown(f"**👨‍💻 Analyst:**")
-                                st.code(log.replace("Data_Analyst:", "").strip())
-                            elif "Supervisor" in log:
-                                st.markdown(f"**👮 Supervisor:** {log.replace('Supervisor:', '').strip()}")
-                            elif "Tool" in log:
-                                st.markdown(f"**⚙️ Tool Output:**")
-                                st.caption(log)
-                            else:
-                                st.text(log)
-                else:
-                    st.error(f"Error {response.status_code}: {response.text}")
-                    
+            with status:
+                live, tokens = st.empty(), ""
+                for event in stream_analysis(query, st.session_state["conversation_id"] if continue_conversation else None):
+                    if event["event"] == "token":
+                        tokens += event["content"]
+                        live.markdown(tokens + "▌")
+                    elif event["event"] == "node":
+                        live.empty()
+                        render_step(event)
+                        status.update(label=f"{event['node']} finished; working...")
+                        live, tokens = st.empty(), ""
+                    elif event["event"] == "final":
+                        live.empty()
+                        status.update(label="🛠️ Agent 'Thought Process' & Code Execution", state="complete", expanded=False)
+                        with result_container:
+                            st.success("### Analysis Result")
+                            st.markdown(event.get("response", "No response provided."))
+                    elif event["event"] == "error":
+                        status.update(label="Analysis failed", state="error")
+                        result_container.error(event["detail"])
+
+        except requests.exceptions.Timeout:
+            status.update(label="Analysis failed", state="error")
+            st.error(f"⏱️ The backend did not respond in time (timeouts: {TIMEOUT[0]:.0f}s to connect, {TIMEOUT[1]:.0f}s between events).")
         except requests.exceptions.ConnectionError:
+            status.update(label="Analysis failed", state="error")
             st.error("🚨 Connection Error: Ensure the FastAPI backend is running on port 8000.")
         except Exception as e:
+            status.update(label="Analysis failed", state="error")
             st.error(f"An error occurred: {str(e)}")
 
 st.markdown("---")
-st.caption("POC Implementation | Powered by LangChain, LangGraph, FastAPI & Grok")
\ No newline at end of file
+st.caption("POC Implementation | Powered by LangChain, LangGraph, FastAPI & Grok")
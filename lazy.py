@@ -0,0 +1,22 @@
+import functools
+import threading
+
+def lazy_singleton(factory):
+    """
+    Turns a zero-argument factory into an accessor that builds the object on first call and
+    returns the same instance afterwards. Concurrent first calls wait for one construction.
+    `accessor.is_initialized()` tells whether it has been built, without building it.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def accessor():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    accessor.is_initialized = lambda: bool(instance)
+    return accessor
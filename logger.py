@@ -1,22 +1,102 @@
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+import time
+import zlib
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from config.config import Config
+from lazy import lazy_singleton
+from metrics import LOG_RECORDS_DROPPED
+
+# Correlates the log lines of one request (set by main's request-id middleware)
+request_id: ContextVar = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not `extra=` fields
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line; `extra=` fields are added as keys."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", "-") != "-":
+            entry["request_id"] = record.request_id
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+class _SampledDebugFilter(logging.Filter):
+    """
+    Passes records at LOG_LEVEL and above; lower (per-step debug) records only for the sampled
+    fraction of requests, so a sampled request keeps all of its lines.
+    """
+    def __init__(self, level: int, sample_rate: float):
+        super().__init__()
+        self.level = level
+        self.threshold = int(sample_rate * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level:
+            return True
+        rid = request_id.get()
+        return rid is not None and zlib.crc32(rid.encode()) % 10000 < self.threshold
+
+class _DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread; never blocks the caller, drops (and counts) when full."""
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(level=record.levelname)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the caller (arguments, traceback, request) now;
+        # the JSON/text formatting happens on the writer thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = request_id.get() or "-"
+        return record
+
+@lazy_singleton
+def _queue_handler() -> QueueHandler:
+    """The process-wide queue handler; its writer thread starts with it and is flushed at exit."""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if Config.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+
+    log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    handler = _DroppingQueueHandler(log_queue)
+    handler.addFilter(_SampledDebugFilter(logging.getLevelName(Config.LOG_LEVEL), Config.LOG_DEBUG_SAMPLE_RATE))
+    return handler
 
 def get_logger(module_name):
     logger = logging.getLogger(module_name)
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-        
+        level = logging.getLevelName(Config.LOG_LEVEL)
+        # Sampled debug lines must reach the handler's filter
+        logger.setLevel(logging.DEBUG if Config.LOG_DEBUG_SAMPLE_RATE > 0 else level)
+        logger.addHandler(_queue_handler())
         logger.propagate = False
-        
-    return logger
\ No newline at end of file
+
+    return logger
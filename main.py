@@ -1,9 +1,27 @@
+import asyncio
+import contextlib
+import hmac
+import os
+import signal
+import time
+import uuid
+import pandas as pd
 import uvicorn
-from fastapi import FastAPI
-from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
-from orchestrator.graph import app_graph
-from logger import get_logger
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from langchain_core.messages import HumanMessage, AIMessageChunk
+from config.config import Config
+from data_generator.data_loader import get_data_manager, SHARED_FRAMES
+from orchestrator.agents import get_primary_llm, reset_chain_registry
+from orchestrator.graph import app_graph, session_checkpointer, session_graph
+from orchestrator.response_cache import ResponseCache
+from orchestrator.batch_jobs import BatchJobStore
+from orchestrator.sessions import SessionStore
+from orchestrator.tools import execution_cache, get_sandbox
+from lazy import lazy_singleton
+from logger import get_logger, request_id
+from metrics import registry, span, start_request_spans, GRAPH_STEPS, REQUEST_SECONDS
 import json
 from security.phi_redactor import PHIRedactor
 from security.input_guardrail import InputGuardrail
@@ -12,52 +30,533 @@ logger = get_logger("API_Gateway")
 redactor = PHIRedactor()
 input_guard = InputGuardrail()
 
-app = FastAPI(title="Health GenAI Microservice")
+@lazy_singleton
+def get_response_cache():
+    """The /analyze response cache (None when disabled); opens its SQLite file on first use."""
+    return ResponseCache(
+        max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+        sqlite_path=Config.RESPONSE_CACHE_SQLITE_PATH or None,
+    ) if Config.RESPONSE_CACHE_ENABLED else None
+
+batch_jobs = BatchJobStore(max_jobs=Config.BATCH_MAX_JOBS)
+# Shared by all batch jobs, so concurrent jobs cannot multiply the load on the LLM
+batch_semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+_batch_tasks = set()
+
+session_store = SessionStore(
+    session_checkpointer,
+    max_sessions=Config.SESSION_MAX,
+    ttl_seconds=Config.SESSION_TTL_SECONDS,
+    max_variable_bytes=Config.SESSION_VARIABLES_MAX_MB * 2**20,
+    max_total_variable_bytes=Config.SESSION_STORE_VARIABLES_MAX_MB * 2**20,
+    max_turns=Config.SESSION_MAX_TURNS,
+)
+
+router = APIRouter()
+
+# Set by warm_up; /ready and the analysis endpoints report 503 until it has succeeded
+_startup = {"ready": False, "error": None, "seconds": None}
+
+async def warm_up():
+    """
+    Builds the process-wide singletons before the service reports ready: the datasets, the LLM
+    client and the response cache in parallel, then the sandbox pool and the prebuilt chains,
+    which need the datasets (and the client). Returns whether the service is ready; safe to
+    call again, e.g. after a failure.
+    """
+    if _startup["ready"]:
+        return True
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            asyncio.to_thread(get_data_manager),
+            asyncio.to_thread(get_primary_llm),
+            asyncio.to_thread(get_response_cache),
+        )
+        await asyncio.gather(asyncio.to_thread(get_sandbox), asyncio.to_thread(reset_chain_registry))
+    except Exception as e:
+        _startup["error"] = str(e)
+        logger.error(f"Startup warm-up failed: {e}")
+        return False
+    _startup.update(ready=True, error=None, seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Warm-up complete in {_startup['seconds']}s; ready to serve.")
+    return True
+
+async def _warm_up_with_retries():
+    """
+    Retries a failed warm-up with exponential backoff (e.g. the data volume or the Groq API
+    not reachable yet). If the last attempt fails too, the process shuts itself down, so the
+    restart policy takes over instead of the service staying unready for good.
+    """
+    attempts = Config.WARM_UP_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        if await warm_up():
+            return
+        if attempt < attempts:
+            delay = min(Config.WARM_UP_RETRY_SECONDS * 2 ** (attempt - 1), Config.WARM_UP_RETRY_MAX_SECONDS)
+            logger.warning(f"Retrying warm-up in {delay:g}s (attempt {attempt + 1} of {attempts}).")
+            await asyncio.sleep(delay)
+    logger.critical(f"Warm-up failed {attempts} times; shutting down.")
+    os.kill(os.getpid(), signal.SIGTERM)
+
+async def _require_ready():
+    if not _startup["ready"]:
+        raise HTTPException(status_code=503, detail="Service is starting up.", headers={"Retry-After": "5"})
+
+GRAPH_CONFIG = {"recursion_limit": 25}
+NO_RESPONSE = "No response generated."
+
+# Offered by clients (GET /schema) as starting points
+SAMPLE_QUERIES = [
+    "How many people who smoke have chronic kidney disease?",
+    "What is the correlation between BMI and Stress Level?",
+    "Does physical activity in the last 10 days differ for patients with Kidney Disease?",
+]
 
 class QueryRequest(BaseModel):
     query: str
+    # Adds a per-stage timing breakdown ("timings") to the response
+    include_timings: bool = False
+    # Continues (or starts) a conversation: follow-ups see the earlier turns and REPL variables
+    session_id: str | None = Field(default=None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
 
-@app.post("/analyze")
-async def analyze_data(request: QueryRequest):
-    logger.info(f"Received query: {request.query}")
+class BatchRequest(BaseModel):
+    queries: list[str] = Field(min_length=1)
+
+class DataRowsRequest(BaseModel):
+    rows: list[dict] = Field(min_length=1)
 
+def _screen_query(query: str):
+    """
+    Runs the security layers on a raw query.
+    Returns (redacted_query, refusal_payload); refusal_payload is None when the query may proceed.
+    """
     # Step 1: Redact PHI/PII from the query
-    redacted_query = redactor.redact_query(request.query)
-    logger.info(f"Redacted query: {redacted_query}")
+    with span("redaction"):
+        redacted_query = redactor.redact_query(query)
+    logger.debug("Redacted query: %s", redacted_query)
+    return redacted_query, _check_scope(redacted_query)
 
+def _check_scope(redacted_query: str):
+    """Returns the refusal payload for an out-of-scope redacted query, or None."""
     # 2. INPUT GUARDRAIL CHECK (Scope and Adversarial Guardrail)
     # Check the REDACTED query for scope violations or jailbreak attempts
-    valid, reason = input_guard.check_query(redacted_query)
+    with span("guardrail"):
+        valid, reason = input_guard.check_query(redacted_query)
     if not valid:
         refusal_message = input_guard.get_refusal_message(reason)
         logger.warning(f"Refusal message: {refusal_message}")
         return {"response": refusal_message, "trace": ["Input Guardrail triggered refusal."]}
 
-    initial_state = {
+    return None
+
+def _cache_key(redacted_query: str) -> str:
+    return ResponseCache.make_key(redacted_query, get_data_manager().data_version, Config.PRIMARY_MODEL_NAME)
+
+# The cache may read and write SQLite, so it is used from a worker thread, off the event loop
+async def _cache_lookup(cache_key: str):
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return None
+    cached = await asyncio.to_thread(response_cache.get, cache_key)
+    if cached:
+        logger.debug("Serving cached response.")
+    return cached
+
+async def _cache_store(cache_key: str, result: dict):
+    # Only complete answers are worth replaying
+    response_cache = get_response_cache()
+    if response_cache is not None and result["response"] != NO_RESPONSE:
+        await asyncio.to_thread(response_cache.set, cache_key, result)
+
+def _initial_state(redacted_query: str) -> dict:
+    return {
         "messages": [HumanMessage(content=redacted_query)],
         "sender": "User"
     }
-    
-    events = app_graph.stream(initial_state, {"recursion_limit": 25})
-    
-    final_response = "No response generated."
-    execution_log = []
-
-    for event in events:
-        for node_name, value in event.items():
-            if "messages" in value:
-                msg = value["messages"][-1]
-                if node_name == "Data_Analyst" and msg.content and not msg.tool_calls:
-                    final_response = msg.content
-                
-                content = msg.content if msg.content else "[Tool Call]"
-                execution_log.append(f"{node_name}: {content}")
+
+def _new_result() -> dict:
+    return {"response": NO_RESPONSE, "trace": [], "tool_calls": [], "llm_calls_avoided": 0, "tokens_saved": 0}
+
+def _record_update(event: dict, result: dict) -> list:
+    """
+    Folds one graph 'updates' event into the running result (final response, trace, and the
+    tool calls with the index of the trace line that requested them and of their output's).
+    Every message of the update gets a trace line, e.g. one per ToolMessage of a batched tools
+    step, in call order. Returns (node, content, tool calls) for each trace line produced by
+    this event.
+    """
+    lines = []
+    for node_name, value in event.items():
+        if value:
+            result["llm_calls_avoided"] += value.get("llm_calls_avoided", 0)
+            result["tokens_saved"] += value.get("tokens_saved", 0)
+        if not value or "messages" not in value:
+            continue
+        for msg in value["messages"]:
+            requested = getattr(msg, "tool_calls", None) or []
+            tool_calls = [{"name": call["name"], "args": call["args"]} for call in requested]
+            if node_name == "Data_Analyst" and msg.content and not tool_calls:
+                result["response"] = msg.content
+
+            content = msg.content if msg.content else "[Tool Call]"
+            result["trace"].append(f"{node_name}: {content}")
+            step = len(result["trace"]) - 1
+            result["tool_calls"].extend(
+                {"step": step, **call, "id": raw.get("id")} for call, raw in zip(tool_calls, requested)
+            )
+            call_id = getattr(msg, "tool_call_id", None)
+            for call in result["tool_calls"]:
+                if call_id and call["id"] == call_id:
+                    call["output_step"] = step
+            lines.append((node_name, content, tool_calls))
+    return lines
+
+def _timings(started: float, spans: list) -> dict:
+    return {"total_seconds": round(time.perf_counter() - started, 6), "spans": spans}
+
+@router.post("/analyze", dependencies=[Depends(_require_ready)])
+async def analyze_data(request: QueryRequest):
+    # Raw queries may contain PHI; only the redacted text is logged (at debug level)
+    logger.info("Received query.", extra={"query_chars": len(request.query)})
+    started = time.perf_counter()
+    spans = start_request_spans() if request.include_timings else None
+
+    payload = await _analyze(request.query, request.session_id)
+
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="analyze")
+    if spans is not None:
+        payload = {**payload, "timings": _timings(started, spans)}
+    return payload
+
+async def _analyze(query: str, session_id: str = None) -> dict:
+    redacted_query, refusal = _screen_query(query)
+    if refusal:
+        return refusal
+
+    result = await _answer(redacted_query, session_id=session_id)
     logger.info("Analysis complete. Sending response.")
+    return result
+
+async def _answer(redacted_query: str, slot=None, session_id: str = None) -> dict:
+    """
+    Answers a screened query from the cache or the graph. The whole answer uses the dataset
+    version current on entry, even if a new one is published meanwhile. `slot` optionally
+    bounds how many graph executions run at once. With a `session_id` the query is the next
+    turn of that conversation, which the response cache cannot answer.
+    """
+    with get_data_manager().pin():
+        if session_id:
+            async with session_store.turn(session_id) as session:
+                return await _run_analysis(redacted_query, session=session)
+
+        cache_key = _cache_key(redacted_query)
+        cached = await _cache_lookup(cache_key)
+        if cached:
+            return {**cached, "cached": True}
+
+        async with slot or contextlib.nullcontext():
+            return await _run_analysis(redacted_query, cache_key)
+
+def _graph_for(session):
+    """The graph and run config: a session continues from its checkpointed conversation."""
+    if session is None:
+        return app_graph, GRAPH_CONFIG
+    return session_graph, {**GRAPH_CONFIG, "configurable": {"thread_id": session.id}}
+
+async def _finish(result: dict, cache_key: str, session):
+    GRAPH_STEPS.observe(len(result["trace"]))
+    if session is None:
+        await _cache_store(cache_key, result)
+    else:
+        result.update(session.describe())
+
+async def _run_analysis(redacted_query: str, cache_key: str = None, session=None) -> dict:
+    """Executes the graph for a screened query and caches the result (outside sessions)."""
+    result = _new_result()
+
+    graph, config = _graph_for(session)
+    async for event in graph.astream(_initial_state(redacted_query), config):
+        _record_update(event, result)
+
+    await _finish(result, cache_key, session)
+    return result
+
+async def _analyze_batch_item(job, index: int, redacted_query: str):
+    """Screens, answers (cache or graph) and records one batch query; failures are recorded, not raised."""
+    try:
+        refusal = _check_scope(redacted_query)
+        if refusal:
+            job.add_result({"index": index, **refusal})
+            return
+
+        result = await _answer(redacted_query, slot=batch_semaphore)
+        job.add_result({"index": index, **result})
+    except Exception as e:
+        logger.error(f"Batch {job.id} query {index} failed: {e}")
+        job.add_result({"index": index, "error": str(e)})
+
+async def _run_batch(job, redacted_queries: list):
+    await asyncio.gather(*(
+        _analyze_batch_item(job, index, query) for index, query in enumerate(redacted_queries)
+    ))
+    logger.info(f"Batch {job.id} complete: {job.total} queries.")
+
+@router.post("/analyze/batch", status_code=202, dependencies=[Depends(_require_ready)])
+async def analyze_batch(request: BatchRequest):
+    """
+    Starts answering many queries concurrently (at most BATCH_CONCURRENCY graph executions at
+    once, under the shared LLM rate limits). Returns a job id; poll GET /analyze/batch/{job_id}.
+    """
+    with span("redaction"):
+        redacted_queries = redactor.redact_many(request.queries)
+    job = batch_jobs.create(total=len(redacted_queries))
+    logger.info(f"Batch {job.id} accepted: {job.total} queries.")
+
+    task = asyncio.create_task(_run_batch(job, redacted_queries))
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+    return job.snapshot()
+
+@router.get("/analyze/batch/{job_id}")
+async def analyze_batch_status(job_id: str, since: int = 0):
+    """
+    Job status and the results finished so far, in completion order; each carries the `index`
+    of its query. Pass the previous `next` as `since` to receive only new results.
+    """
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown batch job.")
+    return job.snapshot(since)
+
+async def _ndjson(events, started: float, spans: list):
+    """Serializes stream events as NDJSON lines; the terminal event gets the timing breakdown."""
+    if spans is not None:
+        # The response body is produced outside the endpoint call; keep collecting into its list
+        start_request_spans(spans)
+    async for event in events:
+        if event["event"] in ("final", "error"):
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint="analyze_stream")
+            if spans is not None:
+                event = {**event, "timings": _timings(started, spans)}
+        yield json.dumps(event) + "\n"
+
+async def _stream_payload(payload: dict):
+    yield {"event": "final", **payload}
+
+async def _stream_cached(cached: dict):
+    """Replays a cached payload in the streaming format (one 'node' event per trace line)."""
+    for step, line in enumerate(cached["trace"]):
+        node_name, _, content = line.partition(": ")
+        event = {"event": "node", "node": node_name, "content": content}
+        tool_calls = [{"name": call["name"], "args": call["args"]} for call in cached.get("tool_calls", []) if call["step"] == step]
+        if tool_calls:
+            event["tool_calls"] = tool_calls
+        yield event
+    yield {"event": "final", **cached, "cached": True}
+
+async def _stream_answer(redacted_query: str, session_id: str = None):
+    """
+    Streams a screened query's answer from the cache or the graph (as the next turn of
+    `session_id`, if given), on one pinned dataset version.
+    """
+    with get_data_manager().pin():
+        if session_id:
+            async with session_store.turn(session_id) as session:
+                async for event in _stream_analysis(redacted_query, session=session):
+                    yield event
+            return
+
+        cache_key = _cache_key(redacted_query)
+        cached = await _cache_lookup(cache_key)
+        events = _stream_cached(cached) if cached else _stream_analysis(redacted_query, cache_key)
+        async for event in events:
+            yield event
+
+async def _stream_analysis(redacted_query: str, cache_key: str = None, session=None):
+    """Yields events for node updates and LLM tokens as the graph produces them."""
+    result = _new_result()
+
+    graph, config = _graph_for(session)
+    try:
+        async for mode, chunk in graph.astream(
+            _initial_state(redacted_query), config, stream_mode=["updates", "messages"]
+        ):
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                # Only forward streamed LLM text; this mode also echoes messages returned by
+                # nodes, and structured-output (supervisor) chunks carry tool-call args, not text
+                if isinstance(message_chunk, AIMessageChunk) and isinstance(message_chunk.content, str) and message_chunk.content:
+                    yield {
+                        "event": "token",
+                        "node": metadata.get("langgraph_node"),
+                        "content": message_chunk.content,
+                    }
+            else:
+                for node_name, content, tool_calls in _record_update(chunk, result):
+                    event = {"event": "node", "node": node_name, "content": content}
+                    if tool_calls:
+                        event["tool_calls"] = tool_calls
+                    yield event
+    except Exception as e:
+        # Headers are already sent, so failures are reported in-band
+        logger.error(f"Streaming analysis failed: {e}")
+        if session is not None:
+            session.discard_turn()
+        yield {"event": "error", "detail": str(e)}
+        return
+
+    await _finish(result, cache_key, session)
+    logger.info("Streaming analysis complete.")
+    yield {"event": "final", **result}
+
+@router.post("/analyze/stream", dependencies=[Depends(_require_ready)])
+async def analyze_data_stream(request: QueryRequest):
+    """
+    Streaming variant of /analyze. Emits newline-delimited JSON objects:
+    'token' (LLM output as generated), 'node' (each completed graph step),
+    then a terminal 'final' (same payload as /analyze) or 'error'.
+    """
+    logger.info("Received streaming query.", extra={"query_chars": len(request.query)})
+    started = time.perf_counter()
+    spans = start_request_spans() if request.include_timings else None
+
+    redacted_query, refusal = _screen_query(request.query)
+    events = _stream_payload(refusal) if refusal else _stream_answer(redacted_query, request.session_id)
+
+    return StreamingResponse(_ndjson(events, started, spans), media_type="application/x-ndjson")
+
+@router.get("/schema", dependencies=[Depends(_require_ready)])
+async def schema():
+    """
+    The datasets the analyst can query (columns, row counts, the schema description it is
+    given) and sample queries, for clients to show. Changes only with the dataset version.
+    """
+    data_manager = get_data_manager()
+    version = data_manager.current
     return {
-        "response": final_response,
-        "trace": execution_log
+        "data_version": version.fingerprint,
+        "datasets": {
+            name: {"rows": len(getattr(version, name)), "columns": list(getattr(version, name).columns)}
+            for name in SHARED_FRAMES
+        },
+        "description": data_manager.get_schema_context(),
+        "sample_queries": SAMPLE_QUERIES,
     }
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and size of the /analyze response cache and the REPL execution cache."""
+    response_cache = get_response_cache()
+    stats = {"enabled": True, **response_cache.stats()} if response_cache is not None else {"enabled": False}
+    stats["execution"] = {"enabled": True, **execution_cache.stats()} if execution_cache is not None else {"enabled": False}
+    return stats
+
+@router.get("/sessions/stats")
+async def session_stats():
+    """Live conversation sessions and the memory their REPL variables take."""
+    return session_store.stats()
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    """Ends a conversation now instead of waiting for it to expire."""
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session.")
+
+def _require_admin(token: str):
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set).")
+    if not hmac.compare_digest(token or "", Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+def _apply_update(update, *args) -> dict:
+    try:
+        return update(*args).describe()
+    except (ValueError, KeyError, OSError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/data/version")
+def data_version(x_admin_token: str = Header(default=None)):
+    """The dataset version new requests run on."""
+    _require_admin(x_admin_token)
+    return get_data_manager().current.describe()
+
+@router.post("/admin/data/activity")
+def append_activity(request: DataRowsRequest, x_admin_token: str = Header(default=None)):
+    """Appends df_activity rows (a row for an existing patient/day replaces it) as a new dataset version."""
+    _require_admin(x_admin_token)
+    return _apply_update(get_data_manager().append_activity, pd.DataFrame(request.rows))
+
+@router.post("/admin/data/health")
+def upsert_health(request: DataRowsRequest, x_admin_token: str = Header(default=None)):
+    """Replaces df_health rows by Patient_Number (new patients are appended) as a new dataset version."""
+    _require_admin(x_admin_token)
+    return _apply_update(get_data_manager().upsert_health, pd.DataFrame(request.rows))
+
+@router.post("/admin/data/reload")
+def reload_data(x_admin_token: str = Header(default=None)):
+    """Reloads both datasets from their CSV files as a new dataset version."""
+    _require_admin(x_admin_token)
+    return _apply_update(get_data_manager().reload)
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, node, LLM and REPL metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@contextlib.asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Warm up in the background so /health answers (and the process counts as alive) meanwhile
+    warm_up_task = asyncio.create_task(_warm_up_with_retries())
+    yield
+    warm_up_task.cancel()
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving HTTP (it may still be warming up)."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 200 once the warm-up has finished, 503 while starting or if it failed."""
+    if _startup["ready"]:
+        return {"status": "ready", "warm_up_seconds": _startup["seconds"]}
+    status = "failed" if _startup["error"] else "starting"
+    return JSONResponse(status_code=503, content={"status": status, "detail": _startup["error"]})
+
+class RequestIdMiddleware:
+    """
+    Tags each HTTP request with an id for log correlation: the client's X-Request-ID header or
+    a new one, echoed in the response. Plain ASGI, so streamed bodies keep the id too.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rid = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"x-request-id"), "")[:64]
+        rid = rid or uuid.uuid4().hex
+        token = request_id.set(rid)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-request-id", rid.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
+
+def create_app() -> FastAPI:
+    """ASGI application factory (`uvicorn main:create_app --factory`); serve.py runs it in each worker."""
+    app = FastAPI(title="Health GenAI Microservice", lifespan=_lifespan)
+    app.include_router(router)
+    app.add_middleware(RequestIdMiddleware)
+    return app
+
 if __name__ == "__main__":
     logger.info("Starting Health GenAI Server...")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
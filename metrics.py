@@ -0,0 +1,130 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34)
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):  # Beyond the last bound only counts toward +Inf
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_label_text(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_label_text(key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram("health_request_seconds", "End-to-end request handling time.")
+STAGE_SECONDS = registry.histogram("health_stage_seconds", "Time spent in a request stage (redaction, guardrail).")
+NODE_SECONDS = registry.histogram("health_node_seconds", "Time spent in a graph node.")
+LLM_SECONDS = registry.histogram("health_llm_call_seconds", "LLM call time per node, including rate-limit waits and retries.")
+LLM_TOKENS = registry.counter("health_llm_tokens_total", "LLM tokens reported by the provider, by node and kind (prompt/completion).")
+TOKENS_SAVED = registry.counter("health_prompt_tokens_saved_total", "Estimated prompt tokens removed by history compaction, by node.")
+REPL_CACHE_LOOKUPS = registry.counter("health_repl_cache_lookups_total", "python_repl_tool execution cache lookups, by result (hit/miss/uncacheable).")
+REPL_SECONDS = registry.histogram("health_repl_execution_seconds", "python_repl_tool execution time in the sandbox.")
+STATS_TOOL_SECONDS = registry.histogram("health_stats_tool_seconds", "Native statistics tool time, by tool (memoized calls included).")
+TOOL_OUTPUT_BYTES = registry.histogram("health_tool_output_bytes", "Size of tool output, by tool.", SIZE_BUCKETS)
+TOOL_CALLS = registry.histogram("health_tool_calls_per_turn", "Tool calls requested in one analyst turn (run concurrently).", COUNT_BUCKETS)
+SESSION_EVENTS = registry.counter("health_session_events_total", "Conversation sessions created, deleted, expired (idle) or evicted (capacity).")
+LOG_RECORDS_DROPPED = registry.counter("health_log_records_dropped_total", "Log records dropped because the log queue was full, by level.")
+GRAPH_STEPS = registry.histogram("health_graph_steps", "Graph node executions per analysis.", COUNT_BUCKETS)
+
+# Spans of the request being handled, when its caller asked for a timing breakdown
+_request_spans: ContextVar = ContextVar("request_spans", default=None)
+
+def start_request_spans(spans: list = None) -> list:
+    """
+    Starts collecting spans for the current request (and tasks/threads it spawns) into `spans`,
+    or a new list. Pass the same list again to resume collecting in another context.
+    """
+    spans = [] if spans is None else spans
+    _request_spans.set(spans)
+    return spans
+
+@contextmanager
+def span(name: str, histogram: Histogram = STAGE_SECONDS, **labels):
+    """
+    Times the block into `histogram` (STAGE_SECONDS is labelled `stage=name`) and, while
+    a request is collecting spans, appends {"span": name, **labels, "seconds": ...} to it.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **({"stage": name} if histogram is STAGE_SECONDS else labels))
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append({"span": name, **labels, "seconds": round(elapsed, 6)})
@@ -1,13 +1,16 @@
 from typing import TypedDict, Annotated, Sequence
+import hashlib
 import operator
-from langchain_groq import ChatGroq
-from langchain_core.messages import BaseMessage, AIMessage
+import threading
+from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, ToolMessage
 from pydantic import BaseModel
 
 from config.config import Config
-from data_generator.data_loader import data_manager
+from data_generator.data_loader import get_data_manager
 from orchestrator.prompts import get_analyst_prompt, get_supervisor_prompt
-from orchestrator.tools import python_repl_tool
+from orchestrator.rate_limit import RateLimiter, call_with_retry
+from metrics import span, LLM_SECONDS, LLM_TOKENS, NODE_SECONDS, TOKENS_SAVED
+from orchestrator.tools import ANALYST_TOOLS
 from logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,64 +19,253 @@ logger = get_logger(__name__)
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     sender: str
+    # Supervisor decisions resolved without an LLM call during this run
+    llm_calls_avoided: Annotated[int, operator.add]
+    # Estimated prompt tokens removed by history compaction during this run
+    tokens_saved: Annotated[int, operator.add]
 
 # --- Global LLM Initialization ---
-PRIMARY_LLM: ChatGroq | None = None
+# Created on first use (normally by the startup warm-up); may be replaced, e.g. by benchmarks
+PRIMARY_LLM = None
+_llm_lock = threading.Lock()
 
-# Initialize Primary LLM
-if Config.GROQ_API_KEY:
+def get_primary_llm():
+    """The primary chat model, creating the Groq client on first call."""
+    global PRIMARY_LLM
+    if PRIMARY_LLM is None:
+        with _llm_lock:
+            if PRIMARY_LLM is None:
+                PRIMARY_LLM = _create_primary_llm()
+    return PRIMARY_LLM
+
+def _create_primary_llm():
+    if not Config.GROQ_API_KEY:
+        raise RuntimeError("Groq LLM could not be initialized: GROQ_API_KEY not found in environment variables.")
+    from langchain_groq import ChatGroq
     try:
-        PRIMARY_LLM = ChatGroq(
+        llm = ChatGroq(
             model=Config.PRIMARY_MODEL_NAME, 
             api_key=Config.GROQ_API_KEY, 
             temperature=0
         )
-        logger.info(f"Primary LLM initialized: {Config.PRIMARY_MODEL_NAME} (Groq).")
     except Exception as e:
         logger.error(f"Primary LLM (Groq) initialization failed: {e}")
+        raise RuntimeError("Groq LLM could not be initialized. Check API key.") from e
+    logger.info(f"Primary LLM initialized: {Config.PRIMARY_MODEL_NAME} (Groq).")
+    return llm
 
-if not PRIMARY_LLM:
-    # Raise a critical error if the primary LLM cannot be configured at startup
-    raise RuntimeError("System startup failed: Groq LLM could not be initialized. Check API key.")
+# --- Chain Registry ---
+class RouterOutput(BaseModel):
+    next_actor: str
 
-# --- Helper function for agent invocation (Simplified) ---
-def _get_llm_chain(is_analyst: bool):
+# Built chains keyed by (role, schema version); rebuilt only when the dataset schema changes
+_CHAIN_REGISTRY: dict = {}
+
+def _schema_version(schema_context: str) -> str:
+    return hashlib.sha1(schema_context.encode()).hexdigest()[:12]
+
+def _build_chain(is_analyst: bool, schema_context: str):
     """Creates the appropriate agent chain using the PRIMARY_LLM."""
-    
+    llm = get_primary_llm()
     if is_analyst:
         # Analyst chain: Tool calling
-        analyst_prompt = get_analyst_prompt(data_manager.get_schema_context())
-        return analyst_prompt | PRIMARY_LLM.bind_tools([python_repl_tool])
+        analyst_prompt = get_analyst_prompt(schema_context, get_data_manager().engine)
+        return analyst_prompt | llm.bind_tools(ANALYST_TOOLS)
     else:
-        # Supervisor chain: Structured output
+        # Supervisor chain: Structured output (raw message kept for its token usage)
         supervisor_prompt = get_supervisor_prompt()
-        class RouterOutput(BaseModel):
-            next_actor: str
-        return supervisor_prompt | PRIMARY_LLM.with_structured_output(RouterOutput)
+        return supervisor_prompt | llm.with_structured_output(RouterOutput, include_raw=True)
+
+def _get_llm_chain(is_analyst: bool):
+    """Returns the prebuilt chain for the role, building it on first use or after a schema change."""
+    schema_context = get_data_manager().get_schema_context()
+    key = ("analyst" if is_analyst else "supervisor", _schema_version(schema_context))
+
+    chain = _CHAIN_REGISTRY.get(key)
+    if chain is None:
+        # Evict chains built against an older schema for this role
+        for stale_key in [k for k in _CHAIN_REGISTRY if k[0] == key[0]]:
+            _CHAIN_REGISTRY.pop(stale_key, None)
+        chain = _CHAIN_REGISTRY[key] = _build_chain(is_analyst, schema_context)
+        logger.info(f"Built {key[0]} chain for schema version {key[1]}.")
+    return chain
+
+def reset_chain_registry():
+    """Drops all prebuilt chains (e.g. after swapping PRIMARY_LLM) and rebuilds them."""
+    _CHAIN_REGISTRY.clear()
+    _get_llm_chain(is_analyst=False)
+    _get_llm_chain(is_analyst=True)
+
+# --- Rate Limiting ---
+llm_rate_limiter = RateLimiter(Config.GROQ_REQUESTS_PER_MINUTE, Config.GROQ_TOKENS_PER_MINUTE)
+
+# Rough per-call overhead for the system prompt, schema and tool definitions
+PROMPT_TOKEN_ESTIMATE = 1500
+
+def _message_tokens(message) -> int:
+    """~4 characters per token."""
+    return (len(str(message.content)) + len(str(message.additional_kwargs))) // 4
+
+def _estimate_tokens(state) -> int:
+    return PROMPT_TOKEN_ESTIMATE + sum(_message_tokens(m) for m in state["messages"])
+
+# --- History Compaction ---
+ROUTING_PREFIX = "Routing to: "
+
+def _is_routing_message(message) -> bool:
+    return isinstance(message, AIMessage) and not message.tool_calls \
+        and isinstance(message.content, str) and message.content.startswith(ROUTING_PREFIX)
+
+def _is_tool_step(message) -> bool:
+    return isinstance(message, AIMessage) and bool(message.tool_calls)
+
+def _truncate_output(text: str, keep_chars: int) -> str:
+    """Keeps the head (e.g. column headers) and tail (e.g. DataFrame shape line) of a long output."""
+    if len(text) <= keep_chars:
+        return text
+    # keep_chars // 4 in compact_messages can reach 0, and text[-0:] would keep everything
+    if keep_chars <= 0:
+        return f"[{len(text)} characters omitted]"
+    head = keep_chars * 3 // 4
+    tail = keep_chars - head
+    return f"{text[:head]}\n... [{len(text) - keep_chars} characters omitted] ...\n{text[len(text) - tail:]}"
+
+def _shrink_older_outputs(messages: list, keep_chars: int) -> list:
+    """Truncates tool outputs that precede the latest tool step; the latest result stays intact."""
+    latest_step = max((i for i, m in enumerate(messages) if _is_tool_step(m)), default=len(messages))
+    return [
+        m.model_copy(update={"content": _truncate_output(m.content, keep_chars)})
+        if i < latest_step and isinstance(m, ToolMessage) and isinstance(m.content, str) else m
+        for i, m in enumerate(messages)
+    ]
+
+def _drop_oldest_step(messages: list) -> list:
+    """Removes the oldest tool call and its results, unless it is the latest step. Returns None if none left."""
+    steps = [i for i, m in enumerate(messages) if _is_tool_step(m)]
+    if len(steps) < 2:
+        return None
+    start = end = steps[0]
+    end += 1
+    while end < len(messages) and isinstance(messages[end], ToolMessage):
+        end += 1
+    return messages[:start] + messages[end:]
+
+def compact_messages(messages, budget: int, keep_chars: int):
+    """
+    Builds the history sent to the LLM (graph state itself is left untouched):
+    supervisor routing messages are dropped and large tool outputs of older steps truncated;
+    while over `budget` estimated tokens, older outputs are cut harder and then the oldest
+    tool steps (call + results) removed. User messages and the latest tool step are always kept.
+    Returns (messages, estimated tokens saved).
+    """
+    def size(msgs):
+        return sum(_message_tokens(m) for m in msgs)
+
+    compacted = _shrink_older_outputs([m for m in messages if not _is_routing_message(m)], keep_chars)
+    if size(compacted) > budget:
+        compacted = _shrink_older_outputs(compacted, keep_chars // 4)
+    while size(compacted) > budget:
+        shorter = _drop_oldest_step(compacted)
+        if shorter is None:
+            break
+        compacted = shorter
+
+    return compacted, size(messages) - size(compacted)
+
+def _compacted_state(state, node: str):
+    """Returns (state with compacted history, tokens saved) for one LLM call."""
+    messages, saved = compact_messages(
+        state["messages"], Config.LLM_HISTORY_TOKEN_BUDGET, Config.TOOL_OUTPUT_KEEP_CHARS
+    )
+    if saved:
+        TOKENS_SAVED.inc(saved, node=node)
+    return {**state, "messages": messages}, saved
+
+async def _invoke_chain(chain, state, node: str):
+    """Invokes a chain under the shared rate limiter, retrying on 429s, and records its usage."""
+    estimated = _estimate_tokens(state)
+    with span("llm", LLM_SECONDS, node=node):
+        result = await call_with_retry(
+            lambda: chain.ainvoke(state),
+            llm_rate_limiter,
+            estimated,
+            max_retries=Config.LLM_MAX_RETRIES,
+            base_delay=Config.LLM_RETRY_BASE_SECONDS,
+        )
+    message = result["raw"] if isinstance(result, dict) else result
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        llm_rate_limiter.settle(estimated, usage["total_tokens"])
+        LLM_TOKENS.inc(usage["input_tokens"], node=node, kind="prompt")
+        LLM_TOKENS.inc(usage["output_tokens"], node=node, kind="completion")
+    return result
 
 # --- Node Functions (Simplified) ---
+# Nodes are coroutines so the graph runs on the event loop via astream/ainvoke;
+# LLM calls are awaited instead of blocking the uvicorn worker.
+
+def route_by_rules(state):
+    """
+    Resolves routing decisions that are fully determined by graph state, or returns None
+    when the state is ambiguous and the LLM supervisor has to decide.
+    """
+    last_message = state["messages"][-1]
+
+    # A new user query always goes to the analyst first
+    if isinstance(last_message, HumanMessage):
+        return "Data_Analyst"
+
+    # An analyst message with content and no tool calls is the final answer
+    if (
+        state.get("sender") == "Data_Analyst"
+        and isinstance(last_message, AIMessage)
+        and last_message.content
+        and not last_message.tool_calls
+    ):
+        return "FINISH"
 
-def supervisor_node(state):
+    return None
+
+async def supervisor_node(state):
     """Invokes the Supervisor."""
-    
+    with span("node", NODE_SECONDS, node="Supervisor"):
+        return await _supervise(state)
+
+async def _supervise(state):
+    if Config.SUPERVISOR_MODE == "hybrid":
+        next_actor = route_by_rules(state)
+        if next_actor:
+            logger.debug("Supervisor fast path: routing to %s without an LLM call.", next_actor)
+            return {
+                "sender": "Supervisor",
+                "messages": [AIMessage(content=f"{ROUTING_PREFIX}{next_actor}")],
+                "llm_calls_avoided": 1,
+            }
+
     supervisor_chain = _get_llm_chain(is_analyst=False)
     
-    logger.info("Supervisor invoked (using Groq).")
-    # Errors (like 401 Invalid Key) will now propagate from here
-    result = supervisor_chain.invoke(state)
+    logger.debug("Supervisor invoked (using Groq).")
+    prompt_state, tokens_saved = _compacted_state(state, node="Supervisor")
+    # Rate limits are retried; other errors (like 401 Invalid Key) propagate from here
+    result = await _invoke_chain(supervisor_chain, prompt_state, node="Supervisor")
+    if result["parsed"] is None:
+        raise result["parsing_error"]
     
     return {
         "sender": "Supervisor", 
-        "messages": [AIMessage(content=f"Routing to: {result.next_actor}")]
+        "messages": [AIMessage(content=f"{ROUTING_PREFIX}{result['parsed'].next_actor}")],
+        "tokens_saved": tokens_saved,
     }
 
-def analyst_node(state):
+async def analyst_node(state):
     """Invokes the Analyst Agent."""
     
     analyst_agent_chain = _get_llm_chain(is_analyst=True)
     
-    logger.info("Analyst Agent invoked (using Groq).")
-    # Errors (like Rate Limit) will now propagate from here
-    result = analyst_agent_chain.invoke(state)
+    logger.debug("Analyst Agent invoked (using Groq).")
+    with span("node", NODE_SECONDS, node="Data_Analyst"):
+        prompt_state, tokens_saved = _compacted_state(state, node="Data_Analyst")
+        # Rate limits are retried with backoff; other errors propagate from here
+        result = await _invoke_chain(analyst_agent_chain, prompt_state, node="Data_Analyst")
     
-    return {"messages": [result], "sender": "Data_Analyst"}
\ No newline at end of file
+    return {"messages": [result], "sender": "Data_Analyst", "tokens_saved": tokens_saved}
\ No newline at end of file
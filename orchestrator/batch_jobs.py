@@ -0,0 +1,52 @@
+import time
+import uuid
+from collections import OrderedDict
+
+class BatchJob:
+    """Results of one /analyze/batch request, appended in completion order as queries finish."""
+    def __init__(self, total: int):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.results = []
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self) -> str:
+        return "completed" if self.finished_at is not None else "running"
+
+    def add_result(self, result: dict):
+        self.results.append(result)
+        if len(self.results) == self.total:
+            self.finished_at = time.time()
+
+    def snapshot(self, since: int = 0) -> dict:
+        """Job status plus the results finished after the first `since` (pass `next` back to poll)."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "completed": len(self.results),
+            "errors": sum(1 for r in self.results if "error" in r),
+            "results": self.results[since:],
+            "next": len(self.results),
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+        }
+
+class BatchJobStore:
+    """In-memory job registry; the oldest finished jobs are dropped beyond `max_jobs`."""
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+
+    def create(self, total: int) -> BatchJob:
+        job = BatchJob(total)
+        self._jobs[job.id] = job
+        for job_id in [k for k, j in self._jobs.items() if j.status == "completed"]:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
@@ -0,0 +1,134 @@
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from langchain_experimental.utilities.python import PythonREPL
+
+# Names whose use makes output non-deterministic or depend on something other than the datasets
+NONDETERMINISTIC_NAMES = {
+    "random", "secrets", "uuid", "uuid1", "uuid4", "time", "perf_counter", "monotonic",
+    "now", "today", "utcnow", "sample", "shuffle", "permutation", "choice", "rand", "randn", "randint",
+    "default_rng", "seed",
+    # Resampling and randomized estimators (scipy, sklearn, statsmodels); random_state may be
+    # unset, so they are never cached, like DataFrame.sample above
+    "train_test_split", "bootstrap", "resample", "permutation_test", "monte_carlo_test",
+    "KFold", "StratifiedKFold", "GroupKFold", "ShuffleSplit", "StratifiedShuffleSplit",
+    "cross_val_score", "cross_validate", "cross_val_predict", "GridSearchCV", "RandomizedSearchCV",
+    "RandomForestClassifier", "RandomForestRegressor", "ExtraTreesClassifier", "ExtraTreesRegressor",
+    "GradientBoostingClassifier", "GradientBoostingRegressor", "KMeans", "MiniBatchKMeans",
+    "GaussianMixture", "TSNE", "MLPClassifier", "MLPRegressor", "SGDClassifier", "SGDRegressor",
+}
+# Keyword arguments of randomized calls (seeded or not: a seed variable cannot be checked statically)
+RANDOM_STATE_KEYWORDS = {"random_state", "seed", "rng"}
+SIDE_EFFECT_NAMES = {
+    "open", "exec", "eval", "compile", "__import__", "input", "globals", "locals", "vars", "setattr", "delattr",
+    "os", "sys", "subprocess", "socket", "shutil", "pathlib", "glob", "requests", "urllib", "httpx", "pickle",
+}
+# DataFrame methods that modify the object they are called on
+MUTATING_METHODS = {"insert", "pop", "update", "__setitem__", "__delitem__"}
+FILE_IO_PREFIXES = ("read_", "to_csv", "to_excel", "to_parquet", "to_pickle", "to_json", "to_sql", "to_feather", "to_hdf")
+
+def parse_code(code: str):
+    """AST of the code as the sandbox will run it, or None if it does not parse."""
+    try:
+        return ast.parse(PythonREPL.sanitize_input(code))
+    except (SyntaxError, ValueError):
+        return None
+
+def _root_name(node):
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+def uncacheable_reason(tree: ast.AST, frame_names) -> str:
+    """
+    Why the code's output cannot be reused, or None for read-only, deterministic code.
+    Conservative: anything that writes to one of the shared frames, draws random numbers,
+    reads the clock or touches files/processes is not cached.
+    """
+    for node in ast.walk(tree):
+        name = node.id if isinstance(node, ast.Name) else node.attr if isinstance(node, ast.Attribute) else None
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            modules = [alias.name for alias in node.names] + ([node.module] if isinstance(node, ast.ImportFrom) else [])
+            names = {part for module in modules if module for part in module.split(".")}
+            if names & (NONDETERMINISTIC_NAMES | SIDE_EFFECT_NAMES):
+                return "imports a non-deterministic or side-effecting module"
+        elif name in NONDETERMINISTIC_NAMES:
+            return f"uses {name} (non-deterministic)"
+        elif name in SIDE_EFFECT_NAMES or (name and name.startswith(FILE_IO_PREFIXES)):
+            return f"uses {name} (side effects)"
+
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete)):
+            targets = node.targets if isinstance(node, (ast.Assign, ast.Delete)) else [node.target]
+            for target in targets:
+                if isinstance(target, (ast.Attribute, ast.Subscript)) and _root_name(target) in frame_names:
+                    return f"modifies {_root_name(target)}"
+        elif isinstance(node, ast.Call):
+            if any(k.arg == "inplace" for k in node.keywords):
+                return "modifies a frame in place"
+            random_keyword = next((k.arg for k in node.keywords if k.arg in RANDOM_STATE_KEYWORDS), None)
+            if random_keyword:
+                return f"passes {random_keyword} (non-deterministic)"
+            func = node.func
+            if isinstance(func, ast.Attribute) and func.attr in MUTATING_METHODS and _root_name(func) in frame_names:
+                return f"modifies {_root_name(func)}"
+    return None
+
+class ExecutionCache:
+    """
+    LRU cache of python_repl_tool output keyed on the normalized code and the dataset
+    fingerprint, so the same analysis (however it is formatted) is executed once per data version.
+    """
+    def __init__(self, frame_names, max_entries: int = 1024):
+        self.frame_names = set(frame_names)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.evictions = 0
+
+    def make_key(self, code: str, data_version: str):
+        """Cache key, or None when the code must always be executed."""
+        tree = parse_code(code)
+        if tree is None or uncacheable_reason(tree, self.frame_names):
+            with self._lock:
+                self.uncacheable += 1
+            return None
+        # The AST dump ignores formatting and comments
+        return hashlib.sha256(f"{data_version}\x1f{ast.dump(tree)}".encode()).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            output = self._entries.get(key)
+            if output is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return output
+
+    def set(self, key: str, output: str):
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "uncacheable": self.uncacheable,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
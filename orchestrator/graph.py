@@ -1,7 +1,9 @@
 from langgraph.graph import StateGraph, END, START
 from langgraph.prebuilt import ToolNode
 from orchestrator.agents import AgentState, analyst_node, supervisor_node 
-from orchestrator.tools import python_repl_tool
+from orchestrator.tools import ANALYST_TOOLS
+from orchestrator.sessions import SessionCheckpointer
+from metrics import span, NODE_SECONDS, TOOL_CALLS
 
 # --- Conditional Logic (remains the same) ---
 def should_continue(state):
@@ -15,6 +17,18 @@ def should_continue(state):
     # The LLM produced a final answer
     return "Supervisor"
 
+tool_node = ToolNode(ANALYST_TOOLS)
+
+async def tools_node(state, config):
+    """
+    Runs the requested tool calls through ToolNode, timed like the agent nodes. ToolNode runs
+    all calls of a turn concurrently and returns their messages in call order; REPL calls get
+    separate sandbox workers (up to SANDBOX_WORKERS at once), each in a fresh namespace.
+    """
+    TOOL_CALLS.observe(len(state["messages"][-1].tool_calls))
+    with span("node", NODE_SECONDS, node="tools"):
+        return await tool_node.ainvoke(state, config)
+
 # --- Graph Construction ---
 
 workflow = StateGraph(AgentState)
@@ -22,7 +36,7 @@ workflow = StateGraph(AgentState)
 # Nodes
 workflow.add_node("Supervisor", supervisor_node)
 workflow.add_node("Data_Analyst", analyst_node)
-workflow.add_node("tools", ToolNode([python_repl_tool]))
+workflow.add_node("tools", tools_node)
 
 # Edges
 workflow.add_edge(START, "Supervisor")
@@ -41,4 +55,7 @@ workflow.add_conditional_edges("Data_Analyst", should_continue, {"tools": "tools
 # Loop Edge
 workflow.add_edge("tools", "Data_Analyst")
 
-app_graph = workflow.compile()
\ No newline at end of file
+app_graph = workflow.compile()
+# Conversation sessions continue from their checkpointed state (thread_id = session id)
+session_checkpointer = SessionCheckpointer()
+session_graph = workflow.compile(checkpointer=session_checkpointer)
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import random
+import time
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` units per second, up to `per_minute` units."""
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are available now)."""
+        self._refill()
+        # A request larger than the whole bucket only waits for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def consume(self, amount: float):
+        # May go negative when actual usage exceeds the estimate; later callers wait it off
+        self._refill()
+        self.level -= amount
+
+class RateLimiter:
+    """
+    Client-side requests-per-minute and tokens-per-minute limits for LLM calls, shared by every
+    graph execution in the process. Either limit set to 0 is disabled. Callers acquire an
+    estimated token count up front and settle it against the provider's reported usage.
+    """
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def acquire(self, estimated_tokens: int = 0):
+        # Serialized so waiting callers are served in arrival order
+        async with self._lock:
+            while True:
+                delay = max(
+                    self._requests.wait_time(1) if self._requests else 0.0,
+                    self._tokens.wait_time(estimated_tokens) if self._tokens else 0.0,
+                )
+                if delay <= 0:
+                    break
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+            if self._requests:
+                self._requests.consume(1)
+            if self._tokens:
+                self._tokens.consume(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Charges (or refunds) the difference between the estimate and the real usage."""
+        if self._tokens:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def _retry_after(error: Exception):
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+async def call_with_retry(call, limiter: RateLimiter, estimated_tokens: int, max_retries: int, base_delay: float):
+    """
+    Awaits `call()` under the rate limiter. A 429 is retried up to `max_retries` times with
+    exponential backoff and jitter, never sooner than the server's Retry-After; other errors
+    propagate immediately.
+    """
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(estimated_tokens)
+        try:
+            return await call()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            delay = base_delay * 2 ** attempt * random.uniform(1.0, 1.5)
+            delay = max(delay, _retry_after(e) or 0.0)
+            logger.warning(f"LLM rate limited (attempt {attempt + 1}/{max_retries + 1}); retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
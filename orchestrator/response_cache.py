@@ -0,0 +1,145 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, so trivially different phrasings share an entry."""
+    return " ".join(query.lower().split())
+
+class ResponseCache:
+    """
+    LRU + TTL cache of /analyze payloads ({"response", "trace"}).
+
+    Entries are keyed on the normalized redacted query, the dataset fingerprint and the model
+    name, so a data reload or model switch never serves stale answers. With `sqlite_path` set,
+    entries are also written to SQLite and survive restarts; the in-memory LRU sits in front.
+    SQLite calls block, so async callers should run get/set in a worker thread. Hits do not
+    write: their access times are buffered and written with the next `set` (or once
+    `access_flush_every` have accumulated).
+    """
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, sqlite_path: str = None,
+                 access_flush_every: int = 64):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, payload)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.access_flush_every = access_flush_every
+        self._pending_access = {}  # key -> last hit time, not yet written to SQLite
+
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, stored_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.commit()
+            logger.info(f"Response cache persisting to {sqlite_path}")
+
+    @staticmethod
+    def make_key(redacted_query: str, data_version: str, model_name: str) -> str:
+        raw = "\x1f".join([normalize_query(redacted_query), data_version, model_name])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, payload: dict):
+        self._entries[key] = (stored_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str):
+        """Returns the cached payload or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT stored_at, payload FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, *entry)
+
+            if entry is None or self._is_expired(entry[0], now):
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._pending_access[key] = now
+                if len(self._pending_access) >= self.access_flush_every:
+                    self._flush_access()
+                    self._db.commit()
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, payload: dict):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, payload)
+            if self._db is not None:
+                # Recent hits first, so the LRU bound below sees their access times
+                self._flush_access()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, payload, stored_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(payload), now, now),
+                )
+                # Same LRU bound on disk
+                self._db.execute(
+                    "DELETE FROM response_cache WHERE key NOT IN "
+                    "(SELECT key FROM response_cache ORDER BY last_access DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def _flush_access(self):
+        """Writes the buffered hit times (uncommitted; the caller commits)."""
+        if self._pending_access:
+            self._db.executemany(
+                "UPDATE response_cache SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        self._pending_access.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending_access.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+        }
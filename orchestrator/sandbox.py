@@ -0,0 +1,288 @@
+import atexit
+import contextlib
+import gc
+import io
+import os
+import pickle
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import types
+from multiprocessing.connection import Connection
+from langchain_experimental.utilities.python import PythonREPL
+from data_generator.shared_frames import SharedFrames, attach_frames
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Time allowed for a new worker to import its libraries before it is considered dead
+WORKER_START_TIMEOUT = 60
+
+class _Worker:
+    def __init__(self, process: subprocess.Popen, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.versions = set()  # Frame versions this worker has attached
+        self.started = False   # Set once the worker has reported that its imports are done
+
+    def wait_started(self, timeout: float):
+        """Consumes the worker's startup message, so execution timeouts never include its imports."""
+        if not self.started:
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"Sandbox worker did not start within {timeout}s.")
+            self.conn.recv()
+            self.started = True
+
+    def kill(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.wait()
+
+class SandboxPool:
+    """
+    Pool of worker processes that execute analysis code.
+
+    The DataFrames are copied once into shared memory; every worker attaches read-only
+    views, so tool calls never pickle data. Each execution gets a fresh namespace with
+    copy-on-write views of the frames, so code cannot leak state into other requests.
+    A worker that exceeds the wall-clock limit is killed and replaced; allocations beyond
+    the memory limit raise MemoryError inside the executed code.
+
+    Several versions of the frames can be live at once (`publish`/`retire`), so executions
+    for in-flight requests keep their data while new requests see a newer version. Workers
+    attach a version on its first use and detach retired ones before their next execution.
+    """
+    def __init__(self, frames: dict, workers: int = 2, timeout: float = 60, memory_limit_mb: int = 0, version=0):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._versions = {}  # version -> SharedFrames
+        self._latest = None
+        self._versions_lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._closed = False
+        self.publish(version, frames)
+        spawned = [self._spawn() for _ in range(workers)]
+        # Workers import in parallel; wait for all, so the first tool calls run at full speed
+        for worker in spawned:
+            worker.wait_started(WORKER_START_TIMEOUT)
+            self._idle.put(worker)
+        atexit.register(self.close)
+        logger.info(f"Sandbox pool started: {workers} workers, {self._versions[version].nbytes / 2**20:.1f} MB shared")
+
+    def publish(self, version, frames):
+        """
+        Exports a version of the frames to shared memory and makes it the default for run/execute.
+        `frames` may also be an already exported source with a manifest (e.g. columnar.ParquetFrames).
+        """
+        shared = frames if hasattr(frames, "manifest") else SharedFrames(frames)
+        with self._versions_lock:
+            self._versions[version] = shared
+            self._latest = version
+        logger.info(f"Sandbox frames version {version} published ({shared.nbytes / 2**20:.1f} MB shared)")
+
+    def retire(self, version):
+        """Unlinks a version's shared memory. Workers still mapping it keep it until they detach."""
+        with self._versions_lock:
+            if version == self._latest:
+                return
+            shared = self._versions.pop(version, None)
+        if shared is not None:
+            shared.close()
+            logger.info(f"Sandbox frames version {version} retired")
+
+    def _spawn(self) -> _Worker:
+        parent_sock, child_sock = socket.socketpair()
+        env = dict(os.environ)
+        # One BLAS thread per worker; the pool provides the parallelism
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            env.setdefault(var, "1")
+
+        # A plain subprocess (not multiprocessing spawn) so workers never re-import the app's __main__
+        process = subprocess.Popen(
+            [sys.executable, "-m", "orchestrator.sandbox", str(child_sock.fileno())],
+            pass_fds=[child_sock.fileno()],
+            cwd=PROJECT_ROOT,
+            env=env,
+        )
+        child_sock.close()
+
+        conn = Connection(parent_sock.detach())
+        conn.send({"memory_limit_mb": self.memory_limit_mb})
+        worker = _Worker(process, conn)
+        self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        self._workers.discard(worker)
+        worker.kill()
+        return self._spawn()
+
+    def run(self, code: str) -> str:
+        """Executes code in an idle worker and returns its captured stdout (or the error repr)."""
+        return self.execute(code)[0]
+
+    def _request(self, worker: _Worker, code: str, version, variables=None) -> dict:
+        """Builds the message for one execution, attaching/detaching frame versions as needed."""
+        with self._versions_lock:
+            if version not in self._versions:
+                logger.warning(f"Sandbox frames version {version} is retired; using version {self._latest}.")
+                version = self._latest
+            live = set(self._versions)
+            manifest = None if version in worker.versions else self._versions[version].manifest
+        request = {"code": code, "version": version, "manifest": manifest, "retire": list(worker.versions - live),
+                   "variables": variables}
+        worker.versions = (worker.versions & live) | {version}
+        return request
+
+    def execute(self, code: str, version=None):
+        """
+        Like run, but returns (output, succeeded); succeeded is False if the code raised or was killed.
+        `version` selects published frames (default: the latest).
+        """
+        return self._call(code, version)
+
+    def execute_with_variables(self, code: str, version, variables: dict, max_bytes: int):
+        """
+        Like execute, for a session: the namespace also starts with `variables` (name -> pickled
+        value, from an earlier call) and the call returns (output, succeeded, variables) with
+        the picklable variables the code leaves behind, up to `max_bytes` pickled. If the
+        worker is killed, the variables passed in are returned unchanged.
+        """
+        output, succeeded, *kept = self._call(code, version, {"values": variables, "max_bytes": max_bytes})
+        return output, succeeded, kept[0] if kept else variables
+
+    def _call(self, code: str, version, variables=None):
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed.")
+
+        worker = self._idle.get()
+        try:
+            worker.wait_started(WORKER_START_TIMEOUT)
+            worker.conn.send(self._request(worker, code, self._latest if version is None else version, variables))
+            if not worker.conn.poll(self.timeout):
+                logger.error(f"Sandbox execution exceeded {self.timeout}s; restarting worker.")
+                worker = self._replace(worker)
+                return f"Execution timed out after {self.timeout} seconds.", False
+            return worker.conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            logger.error(f"Sandbox worker died: {e}; restarting worker.")
+            worker = self._replace(worker)
+            return "Execution failed: the sandbox process exited unexpectedly (possibly out of memory).", False
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in list(self._workers):
+            worker.kill()
+        self._workers.clear()
+        with self._versions_lock:
+            for shared in self._versions.values():
+                shared.close()
+            self._versions.clear()
+
+# --- Worker process ---
+
+def _set_memory_limit(memory_limit_mb: int):
+    """Caps private (non-shared) memory at the current footprint plus the configured budget."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    with open("/proc/self/status") as f:
+        vm_data_kb = next(int(line.split()[1]) for line in f if line.startswith("VmData:"))
+    limit = vm_data_kb * 1024 + memory_limit_mb * 2**20
+    resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+def _execute(code: str, frames: dict, variables: dict = None):
+    """
+    Mirrors PythonREPL.run: returns (printed output, True), or (exception repr, False) on failure.
+    With session `variables` ({"values": ..., "max_bytes": ...}) they are loaded first and the
+    variables left behind are appended to the result.
+    """
+    # Shallow copies: new columns or reassignments stay local to this execution (helpers such as sql() are shared)
+    namespace = {"__name__": "__main__", **{
+        name: value.copy(deep=False) if hasattr(value, "copy") else value for name, value in frames.items()
+    }}
+    output = io.StringIO()
+    try:
+        if variables is not None:
+            namespace.update((name, pickle.loads(data)) for name, data in variables["values"].items())
+        with contextlib.redirect_stdout(output):
+            exec(PythonREPL.sanitize_input(code), namespace)
+        result = output.getvalue(), True
+    except Exception as e:
+        result = repr(e), False
+    if variables is None:
+        return result
+    return (*result, _pickle_variables(namespace, frames, variables["max_bytes"]))
+
+def _pickle_variables(namespace: dict, frames: dict, max_bytes: int) -> dict:
+    """
+    The session-worthy variables of a namespace, pickled: everything the code assigned except
+    the datasets, private names, modules, functions and classes (which do not survive pickling
+    here) and anything unpicklable or beyond the size budget.
+    """
+    kept, total = {}, 0
+    for name, value in namespace.items():
+        if name.startswith("_") or name in frames or isinstance(value, (types.ModuleType, types.FunctionType, type)):
+            continue
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            continue
+        if total + len(data) <= max_bytes:
+            kept[name] = data
+            total += len(data)
+    return kept
+
+def _worker_main(fd: int):
+    import pandas as pd
+    # Writes to shared (read-only) columns copy the affected block instead of failing
+    pd.set_option("mode.copy_on_write", True)
+    # Warm the libraries analysis code imports so the first tool call doesn't pay for them
+    import scipy.stats  # noqa: F401
+    import statsmodels.formula.api  # noqa: F401
+
+    conn = Connection(fd)
+    setup = conn.recv()
+    if setup["memory_limit_mb"]:
+        _set_memory_limit(setup["memory_limit_mb"])
+    conn.send({"started": True})
+
+    attached = {}  # version -> (frames, shared memory blocks or DuckDB connections)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        for version in request["retire"]:
+            _detach(attached, version)
+        if request["manifest"] is not None:
+            attached[request["version"]] = _attach(request["manifest"])
+        conn.send(_execute(request["code"], attached[request["version"]][0], request["variables"]))
+
+def _attach(manifest: dict):
+    if "duckdb" in manifest:
+        from data_generator.columnar import attach_parquet
+        return attach_parquet(manifest["duckdb"])
+    return attach_frames(manifest)
+
+def _detach(attached: dict, version):
+    frames, blocks = attached.pop(version, (None, []))
+    del frames
+    gc.collect()  # Drop the DataFrames' views into the buffers before closing them
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # Still referenced; the mapping goes away with the last reference
+
+if __name__ == "__main__":
+    _worker_main(int(sys.argv[1]))
@@ -0,0 +1,216 @@
+import asyncio
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from metrics import SESSION_EVENTS
+
+# The session whose turn is being answered (set by SessionStore.turn); python_repl_tool reads it
+current_session: ContextVar = ContextVar("current_session", default=None)
+
+class SessionCheckpointer(InMemorySaver):
+    """
+    In-memory checkpointer that only keeps what the next turn needs: after a turn, the
+    intermediate checkpoints of its steps (and their message lists) are dropped.
+    """
+    def has_thread(self, thread_id: str) -> bool:
+        return any(self.storage.get(thread_id, {}).values())
+
+    def prune(self, thread_id: str, rollback: bool = False, max_turns: int = 0):
+        """
+        Keeps one checkpoint per namespace of the thread: the latest, or with `rollback` the
+        earliest (the state the current turn started from, since turns prune when they end).
+        With `max_turns`, the kept message history is cut to that many of the latest turns.
+        """
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if not checkpoints:
+                continue
+            keep = min(checkpoints) if rollback else max(checkpoints)
+            for checkpoint_id in [c for c in checkpoints if c != keep]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            versions = self.serde.loads_typed(checkpoints[keep][0])["channel_versions"]
+            live = {(thread_id, checkpoint_ns, channel, version) for channel, version in versions.items()}
+            for key in [k for k in self.blobs if k[:2] == (thread_id, checkpoint_ns) and k not in live]:
+                del self.blobs[key]
+            if max_turns and "messages" in versions:
+                self._trim_messages((thread_id, checkpoint_ns, "messages", versions["messages"]), max_turns)
+
+    def _trim_messages(self, key: tuple, max_turns: int):
+        """Drops the turns before the latest `max_turns` from a messages blob (a turn starts with the user's query)."""
+        blob = self.blobs.get(key)
+        if blob is None or blob[0] == "empty":
+            return
+        messages = self.serde.loads_typed(blob)
+        starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(starts) > max_turns:
+            self.blobs[key] = self.serde.dumps_typed(messages[starts[-max_turns]:])
+
+class Session:
+    """
+    One conversation: its graph state lives in the checkpointer (thread id = session id), and
+    the REPL variables its code left behind (pickled by the sandbox) live here.
+    """
+    def __init__(self, session_id: str, max_variable_bytes: int):
+        self.id = session_id
+        self.max_variable_bytes = max_variable_bytes
+        self.turns = 0
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self.turn_failed = False
+        # One turn at a time: concurrent turns would fork the checkpointed conversation
+        self.lock = asyncio.Lock()
+        self._variables = {}
+        self._variables_fingerprint = None
+        self._variables_lock = threading.Lock()
+
+    def variables_for(self, fingerprint: str) -> dict:
+        """Pickled variables (name -> bytes), or none if they were computed on other data."""
+        with self._variables_lock:
+            return dict(self._variables) if fingerprint == self._variables_fingerprint else {}
+
+    def keep_variables(self, fingerprint: str, variables: dict):
+        """
+        Merges the variables an execution left behind. Calls of one turn run concurrently, so
+        each adds to the others' results; over the size budget only the newest set is kept.
+        """
+        with self._variables_lock:
+            if fingerprint != self._variables_fingerprint:
+                self._variables, self._variables_fingerprint = {}, fingerprint
+            merged = {**self._variables, **variables}
+            self._variables = merged if sum(map(len, merged.values())) <= self.max_variable_bytes else dict(variables)
+
+    @property
+    def variable_bytes(self) -> int:
+        with self._variables_lock:
+            return sum(map(len, self._variables.values()))
+
+    def save_variables(self) -> tuple:
+        with self._variables_lock:
+            return dict(self._variables), self._variables_fingerprint
+
+    def restore_variables(self, saved: tuple):
+        with self._variables_lock:
+            self._variables, self._variables_fingerprint = dict(saved[0]), saved[1]
+
+    def discard_turn(self):
+        """Marks the running turn as failed (e.g. an error reported in-band), so it is rolled back."""
+        self.turn_failed = True
+
+    def describe(self) -> dict:
+        return {"session_id": self.id, "turn": self.turns}
+
+class SessionStore:
+    """
+    In-memory sessions, dropped (with their checkpoints) after `ttl_seconds` without a turn,
+    or least recently used first beyond `max_sessions` or while all sessions' variables
+    together take more than `max_total_variable_bytes`. Expiry runs whenever a turn starts
+    or ends. Each session keeps the messages of its latest `max_turns` turns (0: all).
+    """
+    def __init__(self, checkpointer: SessionCheckpointer, max_sessions: int = 1000,
+                 ttl_seconds: float = 1800, max_variable_bytes: int = 128 * 2**20,
+                 max_total_variable_bytes: int = 1024 * 2**20, max_turns: int = 20):
+        self.checkpointer = checkpointer
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_variable_bytes = max_variable_bytes
+        self.max_total_variable_bytes = max_total_variable_bytes
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()  # Least recently used first
+
+    def get(self, session_id: str):
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str, reason: str = "deleted") -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.checkpointer.delete_thread(session_id)
+        SESSION_EVENTS.inc(event=reason)
+        return True
+
+    def _variable_bytes(self) -> int:
+        return sum(s.variable_bytes for s in self._sessions.values())
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl_seconds
+        variable_bytes = self._variable_bytes()
+        for session in list(self._sessions.values()):
+            over_capacity = len(self._sessions) > self.max_sessions
+            over_budget = variable_bytes > self.max_total_variable_bytes
+            if session.last_used >= deadline and not over_capacity and not over_budget:
+                break
+            if session.in_use:
+                continue
+            variable_bytes -= session.variable_bytes
+            self.delete(session.id, "expired" if session.last_used < deadline else "evicted")
+
+    def _checkout(self, session_id: str) -> Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id, self.max_variable_bytes)
+            SESSION_EVENTS.inc(event="created")
+        session.last_used = time.monotonic()
+        session.in_use += 1
+        self._sessions.move_to_end(session_id)
+        self._expire()
+        return session
+
+    @contextlib.asynccontextmanager
+    async def turn(self, session_id: str):
+        """
+        Runs one turn of the session (created on first use): waits for its previous turn,
+        makes it the current session, and trims its checkpoints afterwards. A failed or
+        abandoned turn is rolled back (checkpoints and variables), so the conversation never
+        ends in a half-run graph.
+        """
+        session = self._checkout(session_id)
+        try:
+            async with session.lock:
+                resumed = self.checkpointer.has_thread(session_id)
+                saved_variables = session.save_variables()
+                token = current_session.set(session)
+                session.turns += 1
+                session.turn_failed = False
+                try:
+                    yield session
+                except BaseException:
+                    self._roll_back(session, resumed, saved_variables)
+                    raise
+                finally:
+                    current_session.reset(token)
+                if session.turn_failed:
+                    self._roll_back(session, resumed, saved_variables)
+                else:
+                    self.checkpointer.prune(session_id, max_turns=self.max_turns)
+        finally:
+            session.in_use -= 1
+            session.last_used = time.monotonic()
+            if self._sessions.get(session_id) is not session:
+                # Deleted while the turn ran: drop the checkpoints it wrote meanwhile
+                self.checkpointer.delete_thread(session_id)
+            else:
+                # The turn's variables may have pushed the store over its byte budget
+                self._expire()
+
+    def _roll_back(self, session: Session, resumed: bool, saved_variables: tuple):
+        session.turns -= 1
+        session.restore_variables(saved_variables)
+        if resumed:
+            self.checkpointer.prune(session.id, rollback=True)
+        else:
+            self.checkpointer.delete_thread(session.id)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+            "variable_bytes": self._variable_bytes(),
+            "max_variable_bytes": self.max_total_variable_bytes,
+        }
@@ -1,30 +1,304 @@
-from langchain_experimental.utilities import PythonREPL
+import warnings
+from functools import lru_cache
+from typing import Literal, Optional
+import numpy as np
+import pandas as pd
 from langchain_core.tools import tool
-from data_generator.data_loader import data_manager
+from config.config import Config
+from data_generator.data_loader import get_data_manager
+from lazy import lazy_singleton
+from orchestrator.sandbox import SandboxPool
+from orchestrator.execution_cache import ExecutionCache
+from orchestrator.sessions import current_session
+from metrics import span, REPL_CACHE_LOOKUPS, REPL_SECONDS, STATS_TOOL_SECONDS, TOOL_OUTPUT_BYTES
 from logger import get_logger
 
 logger = get_logger(__name__)
 
-# Initialize REPL with the dataframes injected into the global scope
-repl = PythonREPL()
-repl.locals["df_health"] = data_manager.df_health
-repl.locals["df_activity"] = data_manager.df_activity
+REPL_FRAME_NAMES = ("df_health", "df_activity", "df_patient_activity")
+
+def _repl_frames(version):
+    # Frames already in shared memory (multi-worker mode) are handed on as is
+    if version.shared:
+        return version.shared
+    # With the DuckDB engine, workers query the version's Parquet files instead of shared memory
+    if version.parquet_paths:
+        from data_generator.columnar import ParquetFrames
+        return ParquetFrames(version.parquet_paths, Config.DUCKDB_MEMORY_LIMIT_MB)
+    return {name: getattr(version, name) for name in REPL_FRAME_NAMES}
+
+@lazy_singleton
+def get_sandbox() -> SandboxPool:
+    """The process-wide sandbox pool, started on first use (normally by the startup warm-up)."""
+    data_manager = get_data_manager()
+    # Worker processes attach to the dataframes via shared memory; each call runs in a fresh namespace
+    sandbox = SandboxPool(
+        _repl_frames(data_manager.current),
+        workers=Config.SANDBOX_WORKERS,
+        timeout=Config.SANDBOX_TIMEOUT_SECONDS,
+        memory_limit_mb=Config.SANDBOX_MEMORY_LIMIT_MB,
+        version=data_manager.current.number,
+    )
+    # New dataset versions are exported before they become current; old ones freed after their last request
+    data_manager.subscribe(
+        on_publish=lambda version: sandbox.publish(version.number, _repl_frames(version)),
+        on_retire=lambda version: sandbox.retire(version.number),
+    )
+    return sandbox
+
+execution_cache = ExecutionCache(REPL_FRAME_NAMES, max_entries=Config.REPL_CACHE_MAX_ENTRIES) \
+    if Config.REPL_CACHE_ENABLED else None
+
+def _run_in_session(code: str, version, session) -> str:
+    """
+    Runs code with the variables the session's earlier calls left behind and keeps the ones it
+    leaves. Not cached: the output depends on those variables, and a replay would not set them.
+    """
+    variables = session.variables_for(version.fingerprint)
+    with span("repl", REPL_SECONDS):
+        output, _, variables = get_sandbox().execute_with_variables(
+            code, version.number, variables, session.max_variable_bytes
+        )
+    session.keep_variables(version.fingerprint, variables)
+    if variables:
+        output += f"\n[Session variables: {', '.join(sorted(variables))}]"
+    return output
+
+def _run_code(code: str) -> str:
+    """Runs code in the sandbox, reusing the stored output of an identical earlier run when safe."""
+    version = get_data_manager().current
+    session = current_session.get()
+    if session is not None:
+        return _run_in_session(code, version, session)
+    key = execution_cache.make_key(code, version.fingerprint) if execution_cache else None
+    if key is None:
+        if execution_cache:
+            REPL_CACHE_LOOKUPS.inc(result="uncacheable")
+        with span("repl", REPL_SECONDS):
+            return get_sandbox().execute(code, version.number)[0]
+
+    output = execution_cache.get(key)
+    if output is not None:
+        REPL_CACHE_LOOKUPS.inc(result="hit")
+        logger.debug("Serving cached execution output.")
+        return output
+
+    REPL_CACHE_LOOKUPS.inc(result="miss")
+    with span("repl", REPL_SECONDS):
+        output, succeeded = get_sandbox().execute(code, version.number)
+    # Errors, timeouts and crashed workers are not worth replaying
+    if succeeded:
+        execution_cache.set(key, output)
+    return output
 
 @tool
 def python_repl_tool(code: str):
     """
     Executes Python code. 
-    Use this to analyze `df_health` and `df_activity`.
+    Use this to analyze `df_health`, `df_activity` and `df_patient_activity`.
     Access standard libraries: pandas, numpy, scipy, statsmodels.
+    Each call starts from a fresh namespace, except that in a session the variables
+    assigned by earlier calls are kept (listed after the output).
     Always PRINT the final result.
     """
-    code_snippet = code.replace('\n', ' ')[:100] 
-    logger.info(f"Executing Python REPL: {code_snippet}...")
+    logger.debug("Executing Python REPL: %.100s...", code.replace('\n', ' '))
 
     try:
-        result = repl.run(code)
-        logger.info("Code execution successful.")
+        result = _run_code(code)
+        TOOL_OUTPUT_BYTES.observe(len(result.encode()), tool="python_repl_tool")
+        logger.debug("Code execution successful.")
         return result
     except Exception as e:
         logger.error(f"Code execution failed: {str(e)}")
-        return f"Error executing code: {str(e)}"
\ No newline at end of file
+        return f"Error executing code: {str(e)}"
+
+# --- Native Statistics Tools ---
+# Vectorized pandas/SciPy/statsmodels over one row per patient (df_health joined with
+# df_patient_activity), run in-process without generating code. Results are memoized per
+# dataset version, so repeated questions are answered from memory.
+
+STATS_CACHE_SIZE = 256
+
+@lru_cache(maxsize=4)
+def _patient_frame(data_version: str) -> pd.DataFrame:
+    data_manager = get_data_manager()
+    activity = data_manager.df_patient_activity.drop(columns="Patient_Number")
+    return pd.concat([data_manager.df_health, activity], axis=1)
+
+class _ToolInputError(ValueError):
+    """Invalid tool arguments; the message is returned to the model so it can correct the call."""
+
+def _frame(filters: tuple) -> pd.DataFrame:
+    df = _patient_frame(get_data_manager().data_version)
+    _check_columns(df, [column for column, _ in filters])
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in filters:
+        mask &= (df[column] == value).to_numpy()
+    return df[mask]
+
+def _check_columns(df: pd.DataFrame, columns):
+    unknown = [c for c in columns if c not in df.columns]
+    if unknown:
+        raise _ToolInputError(f"Unknown column(s) {unknown}. Available columns: {list(df.columns)}")
+
+def _filter_key(filters: Optional[dict]) -> tuple:
+    return tuple(sorted((filters or {}).items()))
+
+def _describe_filters(filters: tuple) -> str:
+    return f" (filtered: {', '.join(f'{c} == {v}' for c, v in filters)})" if filters else ""
+
+@lru_cache(maxsize=STATS_CACHE_SIZE)
+def _crosstab(data_version: str, rows: str, columns: Optional[str], filters: tuple, normalize: bool) -> str:
+    df = _frame(filters)
+    if columns is None:
+        _check_columns(df, [rows])
+        counts = df[rows].value_counts(dropna=False).sort_index()
+        table = (counts / counts.sum()).round(4) if normalize else counts
+        return f"Counts of {rows}{_describe_filters(filters)}, n={len(df)}:\n{table.to_string()}"
+
+    from scipy import stats
+    _check_columns(df, [rows, columns])
+    counts = pd.crosstab(df[rows], df[columns], margins=True)
+    table = pd.crosstab(df[rows], df[columns], normalize="index").round(4) if normalize else counts
+    lines = [f"Crosstab {rows} x {columns}{_describe_filters(filters)}, n={len(df)}:", table.to_string()]
+    observed = counts.iloc[:-1, :-1]
+    if observed.shape[0] > 1 and observed.shape[1] > 1:
+        chi2, p, dof, _ = stats.chi2_contingency(observed)
+        lines.append(f"Chi-square test of independence: chi2={chi2:.4f}, dof={dof}, p={p:.4g}")
+    return "\n".join(lines)
+
+@lru_cache(maxsize=STATS_CACHE_SIZE)
+def _correlation(data_version: str, columns: tuple, method: str, filters: tuple) -> str:
+    from scipy import stats
+    df = _frame(filters)
+    _check_columns(df, columns)
+    data = df[list(columns)].dropna()
+    lines = [f"{method.title()} correlation matrix{_describe_filters(filters)}, n={len(data)}:",
+             data.corr(method=method).round(4).to_string()]
+    test = stats.pearsonr if method == "pearson" else stats.spearmanr
+    for i, a in enumerate(columns):
+        for b in columns[i + 1:]:
+            r, p = test(data[a], data[b])
+            lines.append(f"{a} vs {b}: r={r:.4f}, p={p:.4g}")
+    return "\n".join(lines)
+
+@lru_cache(maxsize=STATS_CACHE_SIZE)
+def _compare_groups(data_version: str, value: str, group: str, filters: tuple) -> str:
+    from scipy import stats
+    df = _frame(filters)
+    _check_columns(df, [value, group])
+    data = df[[group, value]].dropna()
+    summary = data.groupby(group)[value].agg(["count", "mean", "std", "median"]).round(4)
+    lines = [f"{value} by {group}{_describe_filters(filters)}:", summary.to_string()]
+
+    samples = [g[value].to_numpy() for _, g in data.groupby(group) if len(g) > 1]
+    if len(samples) == 2:
+        t = stats.ttest_ind(*samples, equal_var=False)
+        u = stats.mannwhitneyu(*samples)
+        lines.append(f"Welch t-test: t={t.statistic:.4f}, p={t.pvalue:.4g}")
+        lines.append(f"Mann-Whitney U: U={u.statistic:.1f}, p={u.pvalue:.4g}")
+    elif len(samples) > 2:
+        f = stats.f_oneway(*samples)
+        h = stats.kruskal(*samples)
+        lines.append(f"One-way ANOVA: F={f.statistic:.4f}, p={f.pvalue:.4g}")
+        lines.append(f"Kruskal-Wallis: H={h.statistic:.4f}, p={h.pvalue:.4g}")
+    else:
+        lines.append("Fewer than two groups with data; no test performed.")
+    return "\n".join(lines)
+
+@lru_cache(maxsize=STATS_CACHE_SIZE)
+def _regression(data_version: str, target: str, predictors: tuple, kind: str, filters: tuple) -> str:
+    import statsmodels.api as sm
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning, PerfectSeparationError, PerfectSeparationWarning
+    df = _frame(filters)
+    _check_columns(df, (target,) + predictors)
+    data = df[[target, *predictors]].dropna()
+    if kind == "auto":
+        kind = "logit" if set(data[target].unique()) <= {0, 1} else "ols"
+
+    X = sm.add_constant(data[list(predictors)].astype(float))
+    y = data[target].astype(float)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            model = sm.Logit(y, X).fit(disp=0) if kind == "logit" else sm.OLS(y, X).fit()
+        except PerfectSeparationError as e:  # Raised instead of warned by older statsmodels
+            raise _ToolInputError(f"{e} Drop or combine the predictor(s) that determine {target}.")
+    # Reported with the result: the estimates of a model that did not converge are not usable
+    problems = sorted({str(w.message).strip().rstrip(".") + "." for w in caught if issubclass(w.category, (ConvergenceWarning, PerfectSeparationWarning))})
+
+    ci = model.conf_int()
+    table = pd.DataFrame({"coef": model.params, "p_value": model.pvalues, "ci_low": ci[0], "ci_high": ci[1]})
+    if kind == "logit":
+        table["odds_ratio"] = np.exp(model.params)
+        fit = f"pseudo R2={model.prsquared:.4f}, LLR p={model.llr_pvalue:.4g}"
+    else:
+        fit = f"R2={model.rsquared:.4f}, adj. R2={model.rsquared_adj:.4f}, F p={model.f_pvalue:.4g}"
+    lines = [
+        f"{kind.upper()} regression of {target} on {', '.join(predictors)}{_describe_filters(filters)}, n={len(data)}:",
+        # Significant digits: per-unit effects of e.g. steps or mg/day are tiny
+        table.to_string(float_format=lambda v: f"{v:.4g}"),
+        fit,
+    ]
+    if problems:
+        lines.append(
+            "WARNING: the fit is unreliable; do not report these coefficients, p-values or intervals as valid. "
+            + " ".join(problems)
+            + (" This is usually (quasi-)perfect separation: the predictor(s) almost determine the outcome." if kind == "logit" else "")
+        )
+    return "\n".join(lines)
+
+def _run_stats_tool(name: str, compute, *args) -> str:
+    logger.debug("Running %s%s", name, args)
+    try:
+        with span("stats_tool", STATS_TOOL_SECONDS, tool=name):
+            result = compute(get_data_manager().data_version, *args)
+    except _ToolInputError as e:
+        result = f"Error: {e}"
+    except Exception as e:
+        logger.error(f"{name} failed: {e}")
+        result = f"Error running {name}: {e!r}"
+    TOOL_OUTPUT_BYTES.observe(len(result.encode()), tool=name)
+    return result
+
+@tool
+def crosstab_tool(rows: str, columns: Optional[str] = None, filters: Optional[dict] = None, normalize: bool = False):
+    """
+    Counts patients per value of `rows`, or cross-tabulates `rows` x `columns` (with margins and
+    a chi-square test of independence). `filters` restricts to exact matches, e.g. {"Sex": 1}.
+    `normalize` returns proportions (within each row) instead of counts.
+    Columns: any df_health or df_patient_activity column (one row per patient).
+    """
+    return _run_stats_tool("crosstab_tool", _crosstab, rows, columns, _filter_key(filters), normalize)
+
+@tool
+def correlation_tool(columns: list[str], method: Literal["pearson", "spearman"] = "pearson", filters: Optional[dict] = None):
+    """
+    Correlation matrix of two or more numeric columns, with r and p-value for every pair.
+    `filters` restricts to exact matches, e.g. {"Smoking": 1}.
+    Columns: any df_health or df_patient_activity column (one row per patient).
+    """
+    return _run_stats_tool("correlation_tool", _correlation, tuple(columns), method, _filter_key(filters))
+
+@tool
+def compare_groups_tool(value: str, group: str, filters: Optional[dict] = None):
+    """
+    Compares a numeric `value` column across the groups of `group` (count, mean, std, median).
+    Two groups: Welch t-test and Mann-Whitney U. More groups: one-way ANOVA and Kruskal-Wallis.
+    `filters` restricts to exact matches, e.g. {"Sex": 0}.
+    Columns: any df_health or df_patient_activity column (one row per patient).
+    """
+    return _run_stats_tool("compare_groups_tool", _compare_groups, value, group, _filter_key(filters))
+
+@tool
+def regression_tool(target: str, predictors: list[str], kind: Literal["auto", "ols", "logit"] = "auto", filters: Optional[dict] = None):
+    """
+    Fits a regression of `target` on `predictors` and reports coefficients, p-values, 95% CIs
+    and fit statistics. kind="auto" uses logistic regression (with odds ratios) for 0/1 targets
+    and OLS otherwise. `filters` restricts to exact matches, e.g. {"Pregnancy": 0}.
+    Columns: any df_health or df_patient_activity column (one row per patient).
+    """
+    return _run_stats_tool("regression_tool", _regression, target, tuple(predictors), kind, _filter_key(filters))
+
+# Tools bound to the analyst and executed by the graph's tool node; python_repl_tool is the fallback
+ANALYST_TOOLS = [python_repl_tool, crosstab_tool, correlation_tool, compare_groups_tool, regression_tool]
@@ -35,31 +35,96 @@ class PHIRedactor:
         # The replacement string format
         self.redacted_template = "[REDACTED_{}]"
 
-    def _redact_with_regex(self, text):
-        """Applies all defined regex patterns to the text."""
-        for name, pattern in self.regex_patterns.items():
-            replacement = self.redacted_template.format(name)
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        return text
+        # Redaction runs in tiers with the legacy precedence: rules, EMAIL, then the number
+        # patterns. Each tier scans the text once and only runs its rules or patterns where they
+        # can match, so the output is the same as the legacy passes (one re.sub per rule and
+        # pattern). Keep these in sync when adding rules or patterns; benchmarks/bench_redactor.py
+        # checks the output against the legacy passes.
+        # Rules: one alternation, leftmost match first. Every rule starts with "my" or "I am"
+        # at its own fixed phrase, and no phrase can start inside another, so a rule never takes
+        # text a rule before it in the list would have taken.
+        self.rule_start_chars = "mi"
+        # EMAIL: runs of these characters (regex class contents) around an "@"
+        self.email_chars = r"a-zA-Z0-9._%+\-@"
+        # SSN, PHONE, DOB, in this order: runs of these characters from their first "(" or digit
+        # (where the patterns' matches start), if long enough for the shortest match (DOB, e.g.
+        # 1/2/34). Matches cannot leave a run, and replacements only split it.
+        self.number_patterns = ("SSN", "PHONE", "DOB")
+        self.number_chars = r"\d\s().\-/"
+        self.number_min_chars = 6
 
-    def _redact_with_rules(self, text):
-        """Applies simple rule-based redaction based on keywords."""
-        for pattern, replacement in self.name_redaction_rules:
-            # Use a word boundary to prevent matching substrings
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        return text
+        self._compile_tiers()
+
+    def _compile_tiers(self):
+        alternatives, self._rule_templates, offset = [], {}, 1
+        for i, (pattern, replacement) in enumerate(self.name_redaction_rules):
+            # Rule templates hold text and group references (\1); the references shift by the
+            # groups of the rules (and wrappers) before this one. Split once, so a match only joins.
+            parts = re.split(r"\\(\d+)", replacement)
+            self._rule_templates[f"rule{i}"] = [
+                int(part) + offset if j % 2 else part for j, part in enumerate(parts)
+            ]
+            alternatives.append(f"(?P<rule{i}>{pattern})")
+            offset += re.compile(pattern).groups + 1
+        self._rules = re.compile(
+            f"(?=[{self.rule_start_chars}])(?:{'|'.join(alternatives)})", flags=re.IGNORECASE
+        )
+
+        self._email_run = re.compile(f"[{self.email_chars}]*", flags=re.IGNORECASE)
+        self._email = re.compile(self.regex_patterns["EMAIL"], flags=re.IGNORECASE)
+
+        self._number_runs = re.compile(f"[(\\d][{self.number_chars}]{{{self.number_min_chars - 1},}}")
+        self._number_passes = [
+            (re.compile(self.regex_patterns[name], flags=re.IGNORECASE).sub, self.redacted_template.format(name))
+            for name in self.number_patterns
+        ]
+
+    def _redact_rule(self, match) -> str:
+        template, group = self._rule_templates[match.lastgroup], match.group
+        return "".join(group(part) or "" if isinstance(part, int) else part for part in template)
+
+    def _redact_emails(self, text: str) -> str:
+        parts, done = [], 0
+        replacement = self.redacted_template.format("EMAIL")
+        at = text.find("@")
+        while at >= 0:
+            # Walk back over the run (emails are short), then match it forward
+            start = at
+            while start > done and self._email_run.fullmatch(text, start - 1, start):
+                start -= 1
+            end = self._email_run.match(text, at).end()
+            parts += [text[done:start], self._email.sub(replacement, text[start:end])]
+            done = end
+            at = text.find("@", done)
+        return "".join(parts) + text[done:] if parts else text
+
+    def _redact_number_run(self, match) -> str:
+        # One character of context on each side, so \\b sees what it sees in the whole text
+        text, start, end = match.string, match.start(), match.end()
+        left = 1 if start else 0
+        segment = text[start - left:end + 1]
+        for sub, replacement in self._number_passes:
+            segment = sub(replacement, segment)
+        return segment[left:len(segment) - (1 if end < len(text) else 0)]
+
+    def _redact(self, text: str) -> str:
+        text = self._rules.sub(self._redact_rule, text)
+        text = self._redact_emails(text)
+        return self._number_runs.sub(self._redact_number_run, text)
 
     def redact_query(self, query: str) -> str:
         """
-        Redacts PHI/PII from the input query using a two-step process.
+        Redacts PHI/PII from the input query: rule-based redaction (e.g. specific phrases),
+        then pattern-based (regex) redaction.
         """
         if not query:
             return ""
 
-        # Step 1: Apply rule-based redaction (e.g., specific phrases)
-        redacted_query = self._redact_with_rules(query)
-        
-        # Step 2: Apply pattern-based (regex) redaction
-        redacted_query = self._redact_with_regex(redacted_query)
+        return self._redact(query)
 
-        return redacted_query
\ No newline at end of file
+    def redact_many(self, texts: list[str]) -> list[str]:
+        """
+        Redacts a batch of texts (log scrubbing, batch endpoints) with the shared compiled tiers.
+        """
+        redact = self._redact
+        return [redact(text) if text else "" for text in texts]
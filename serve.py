@@ -0,0 +1,38 @@
+"""
+Production launcher. With API_WORKERS > 1 the datasets are loaded once, here, into shared
+memory; uvicorn then starts the workers from the main:create_app factory and each one attaches
+read-only views of the same blocks (so do its sandbox processes) instead of loading its own copy.
+With DATA_ENGINE=duckdb the workers open the launcher's Parquet exports instead.
+
+Only the data layer is loaded in this process: LLM clients, sandbox pools and caches are
+created by each worker's startup warm-up.
+"""
+import os
+import uvicorn
+from config.config import Config
+from data_generator.data_loader import DataManager, SHARED_DATASET_ENV
+from logger import get_logger
+
+logger = get_logger("Launcher")
+
+def main():
+    if Config.API_WORKERS <= 1:
+        logger.info("Starting Health GenAI Server (single process)...")
+        uvicorn.run("main:create_app", factory=True, host=Config.API_HOST, port=Config.API_PORT)
+        return
+
+    if Config.DATA_WATCH_INTERVAL_SECONDS > 0:
+        logger.warning("DATA_WATCH_INTERVAL_SECONDS is not supported with API_WORKERS > 1; dataset files are not watched.")
+    # Built directly rather than through get_data_manager, which would start the file watcher
+    manager = DataManager(Config.dataset_path1, Config.dataset_path2, Config.DATA_ENGINE)
+    shared = manager.share()
+    logger.info(f"Starting Health GenAI Server with {Config.API_WORKERS} workers...")
+    try:
+        uvicorn.run("main:create_app", factory=True, host=Config.API_HOST, port=Config.API_PORT, workers=Config.API_WORKERS)
+    finally:
+        if shared is not None:
+            shared.close()
+        os.remove(os.environ.pop(SHARED_DATASET_ENV))
+
+if __name__ == "__main__":
+    main()